@@ -1,18 +1,139 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Cookie set after a write so the same client keeps reading from the primary
+LAST_WRITE_COOKIE = "badal_last_write"
+READ_METHODS = ("GET", "HEAD")
+
+# Seconds a replica is behind; 0 when it has replayed everything it received
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+def _create_engine(url: str, pre_ping: bool):
+    # SQLite (local/benchmark stand-in) connections are shared across the threadpool
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=connect_args, pool_pre_ping=pre_ping)
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL, settings.DATABASE_POOL_PRE_PING)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+
+class Replica:
+    """A read engine plus its last observed health and replication lag."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = _create_engine(url, settings.REPLICA_POOL_PRE_PING)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.healthy = True
+        self.lag = 0.0
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        # A dropped connection takes the replica out of rotation until the next check
+        if context.is_disconnect:
+            self.healthy = False
+            self.checked_at = time.monotonic()
+
+    def check(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            return  # another request is already checking
+        try:
+            with self.engine.connect() as conn:
+                if self.engine.dialect.name == "postgresql":
+                    self.lag = float(conn.execute(POSTGRES_LAG_QUERY).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    self.lag = 0.0
+            self.healthy = True
+        except Exception as e:
+            logger.warning(f"Read replica {self.engine.url!r} unavailable: {str(e)}")
+            self.healthy = False
+        finally:
+            self.checked_at = time.monotonic()
+            self._lock.release()
+
+    def usable(self) -> bool:
+        if time.monotonic() - self.checked_at > settings.REPLICA_CHECK_INTERVAL:
+            self.check()
+        return self.healthy and self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+replicas: List[Replica] = [Replica(url) for url in settings.DATABASE_REPLICA_URLS]
+_replica_cycle = itertools.cycle(replicas) if replicas else None
+
+
+def pick_replica() -> Optional[Replica]:
+    """Next healthy, caught-up replica in round-robin order, or None for the primary."""
+    for _ in range(len(replicas)):
+        replica = next(_replica_cycle)
+        if replica.usable():
+            return replica
+    return None
+
+
+def wrote_recently(request: Request) -> bool:
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < settings.READ_YOUR_WRITES_SECONDS
+
+
+def get_db(request: Request = None):
+    """Session for the current request.
+
+    GET/HEAD requests read from a replica unless this client wrote within
+    READ_YOUR_WRITES_SECONDS or no replica is healthy and caught up; every
+    other method uses the primary.
+    """
+    factory = SessionLocal
+    if request is not None and request.method in READ_METHODS and replicas and not wrote_recently(request):
+        replica = pick_replica()
+        if replica is not None:
+            factory = replica.session_factory
+    db = factory()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """Stamp a cookie on successful writes so follow-up reads stick to the primary."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS + ("OPTIONS",):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = f"{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={int(settings.READ_YOUR_WRITES_SECONDS) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,10 +1,50 @@
-#from backend.app.config import Base, engine
+from typing import List
 
-#def create_tables():
-#    print("Creating database tables...")
- #   Base.metadata.create_all(engine)
-#    print("Tables created successfully!")
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
 
-#if __name__ == "__main__":
- #   create_tables()
+from .database import engine
+from .models.models import Base
 
+def create_tables():
+    """One-time schema setup; run before starting request workers."""
+    print("Creating database tables...")
+    Base.metadata.create_all(bind=engine)
+    print("Tables created successfully!")
+
+def add_missing_columns(model, bind=None) -> List[str]:
+    """Add the columns and indexes `model` declares but its existing table lacks.
+
+    create_all only creates missing tables, so columns added to a model after
+    its table was created need this before they are backfilled. New columns
+    must be nullable. Returns the DDL statements executed.
+    """
+    bind = bind or engine
+    table = model.__table__
+    statements = []
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        if not inspector.has_table(table.name):
+            table.create(conn)
+            return [f"CREATE TABLE {table.name}"]
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                raise ValueError(f"Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+            ddl = str(CreateColumn(column).compile(dialect=conn.dialect))
+            for fk in column.foreign_keys:
+                ddl += f" REFERENCES {fk.column.table.name} ({fk.column.name})"
+            statements.append(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+            conn.execute(text(statements[-1]))
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(conn)
+                statements.append(f"CREATE INDEX {index.name}")
+    return statements
+
+if __name__ == "__main__":
+    create_tables()
@@ -0,0 +1,309 @@
+import bisect
+import glob
+import json
+import os
+import re
+import resource
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+from .config import settings
+
+# Latency buckets in seconds, Prometheus-style cumulative upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class Histogram:
+    """Fixed-bucket histogram keyed by a label tuple."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> List[list]:
+        """Series as JSON-friendly [labels, bucket counts, sum, count] rows."""
+        with self._lock:
+            return [[list(labels), list(counts), total, n] for labels, (counts, total, n) in self._series.items()]
+
+    def render(self, name: str, label_names: Tuple[str, ...], workers: Dict[int, List[list]]) -> List[str]:
+        """Exposition lines for every worker's snapshot, one series per (pid, labels)."""
+        lines = [f"# TYPE {name} histogram"]
+        for pid, items in sorted(workers.items()):
+            for labels, counts, total, n in items:
+                base = ",".join(f'{k}="{v}"' for k, v in zip(("pid",) + label_names, [pid, *labels]))
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{base},le="+Inf"}} {n}')
+                lines.append(f"{name}_sum{{{base}}} {total}")
+                lines.append(f"{name}_count{{{base}}} {n}")
+        return lines
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+request_latency = Histogram(LATENCY_BUCKETS)
+request_queries = Histogram(QUERY_COUNT_BUCKETS)
+request_db_time = Histogram(LATENCY_BUCKETS)
+slow_queries = deque(maxlen=settings.SLOW_QUERY_SAMPLES)
+
+# Name, histogram and label names of everything exported per worker
+HISTOGRAMS = (
+    ("badal_http_request_duration_seconds", request_latency, ("method", "route", "status")),
+    ("badal_http_request_db_queries", request_queries, ("method", "route")),
+    ("badal_http_request_db_duration_seconds", request_db_time, ("method", "route")),
+)
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def redact_statement(statement: str) -> str:
+    """Replace inline literals so slow-query samples never carry patient data."""
+    return _LITERAL_RE.sub("?", " ".join(statement.split()))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        # Bound parameters are dropped entirely; only their count is kept
+        if executemany or isinstance(parameters, (list, tuple)):
+            param_count = len(parameters or ())
+        else:
+            param_count = len(parameters or {})
+        slow_queries.append({
+            "statement": redact_statement(statement),
+            "duration_ms": round(elapsed * 1000, 2),
+            "parameters": param_count,
+            "executemany": executemany,
+            "at": time.time(),
+        })
+
+
+def instrument_engine(engine) -> None:
+    """Attach query counting and slow-query sampling hooks to an engine."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope) -> str:
+    """Full path template of the matched route, e.g. `/api/patients/{patient_id}`.
+
+    FastAPI may dispatch included routers without flattening them, in which
+    case `scope["route"].path` is relative to its router. The router prefix is
+    then the part of the request path in front of what the route matched.
+    Unmatched requests share one label so scanners cannot inflate cardinality.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    regex = getattr(route, "path_regex", None)
+    if template is None or regex is None:
+        return "unmatched"
+    path = scope.get("path", "")
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    start = 0
+    while start != -1:
+        if regex.match(path[start:]):
+            return path[:start] + template
+        start = path.find("/", start + 1)
+    return template
+
+
+def _worker_file(pid: int) -> str:
+    return os.path.join(settings.METRICS_DIR, f"worker-{pid}.json")
+
+
+def flush_worker_metrics() -> None:
+    """Write this worker's histograms where the worker answering a scrape can read them."""
+    if not settings.METRICS_DIR:
+        return
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _worker_file(os.getpid())
+    with open(path + ".tmp", "w") as f:
+        json.dump({name: histogram.snapshot() for name, histogram, _ in HISTOGRAMS}, f)
+    os.replace(path + ".tmp", path)
+
+
+def reset_worker_metrics() -> None:
+    """Forget files left by a previous server run (called from the gunicorn master on start)."""
+    if settings.METRICS_DIR:
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, "worker-*.json")):
+            os.remove(path)
+
+
+def remove_worker_metrics(pid: int) -> None:
+    """Drop an exited worker's file (called from the gunicorn master)."""
+    if settings.METRICS_DIR:
+        try:
+            os.remove(_worker_file(pid))
+        except FileNotFoundError:
+            pass
+
+
+_flusher_pid = None
+
+
+def _start_flusher() -> None:
+    # Started from the first request so it runs in the worker, not the preloading master
+    global _flusher_pid
+    if not settings.METRICS_DIR or _flusher_pid == os.getpid():
+        return
+    _flusher_pid = os.getpid()
+
+    def run():
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                flush_worker_metrics()
+            except OSError:
+                pass
+
+    threading.Thread(target=run, name="metrics-flush", daemon=True).start()
+
+
+def _worker_snapshots() -> Dict[str, Dict[int, List[list]]]:
+    """Every worker's series per histogram: this worker live, the others from their last flush."""
+    pid = os.getpid()
+    snapshots = {name: {pid: histogram.snapshot()} for name, histogram, _ in HISTOGRAMS}
+    if not settings.METRICS_DIR:
+        return snapshots
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, "worker-*.json")):
+        other = int(os.path.basename(path)[len("worker-"):-len(".json")])
+        if other == pid:
+            continue
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name in snapshots:
+            snapshots[name][other] = data.get(name, [])
+    return snapshots
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and DB usage per route template."""
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        _start_flusher()
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.server_timing:
+                    total = (time.perf_counter() - start) * 1000
+                    header = f"app;dur={total:.1f}, db;dur={stats.db_time * 1000:.1f};desc=\"{stats.queries} queries\""
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            labels = (scope["method"], route_template(scope), str(status["code"]))
+            request_latency.observe(labels, time.perf_counter() - start)
+            request_queries.observe(labels[:2], stats.queries)
+            request_db_time.observe(labels[:2], stats.db_time)
+
+
+def read_memory() -> Dict[str, int]:
+    """Resident and proportional set size in bytes for the current process.
+
+    PSS splits pages shared with other workers, so summing it across workers
+    shows how much copy-on-write sharing of preloaded models is paying off.
+    """
+    memory = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Private_Dirty"):
+                    memory[key.lower()] = int(value.split()[0]) * 1024
+    except OSError:
+        memory["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return memory
+
+
+# Set by the production server hooks once the worker has booted
+worker_info = {"startup_seconds": None}
+
+
+def render_metrics() -> str:
+    lines = []
+    snapshots = _worker_snapshots()
+    for name, histogram, label_names in HISTOGRAMS:
+        lines += histogram.render(name, label_names, snapshots[name])
+    lines.append("# TYPE badal_db_slow_queries_sampled gauge")
+    lines.append(f"badal_db_slow_queries_sampled {len(slow_queries)}")
+    pid = os.getpid()
+    for key, value in read_memory().items():
+        lines.append(f"# TYPE badal_process_memory_{key}_bytes gauge")
+        lines.append(f'badal_process_memory_{key}_bytes{{pid="{pid}"}} {value}')
+    if worker_info["startup_seconds"] is not None:
+        lines.append("# TYPE badal_worker_startup_seconds gauge")
+        lines.append(f'badal_worker_startup_seconds{{pid="{pid}"}} {worker_info["startup_seconds"]}')
+    return "\n".join(lines) + "\n"
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/slow-queries", include_in_schema=False)
+def read_slow_queries():
+    return list(slow_queries)
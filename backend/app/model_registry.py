@@ -0,0 +1,270 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import model_store
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Artifact layout: {MODEL_DIR}/{name}/{version}/model.onnx (or model.tflite)
+# with an optional metadata.json: {"classes": [...], "input_size": 224}.
+# An ONNX model may keep its large initializers as external data in
+# weights/<initializer>.npy; those are served from model_store's shared
+# memory maps instead of being read into each worker.
+BACKEND_FILES = {
+    "onnx": "model.onnx",
+    "tflite": "model.tflite",
+}
+
+
+class OnnxBackend:
+    def __init__(self, path: str, threads: int):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        weights = model_store.weights_for(os.path.dirname(path))
+        if weights:
+            # Run on the mapped buffers as-is; prepacking would copy them per worker
+            options.add_session_config_entry("session.disable_prepacking", "1")
+            # OrtValues wrap the mapped arrays without copying and must outlive the session
+            self._initializers = [ort.OrtValue.ortvalue_from_numpy(array) for array in weights.values()]
+            options.add_external_initializers(list(weights), self._initializers)
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+class TFLiteBackend:
+    def __init__(self, path: str, threads: int):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.interpreter = Interpreter(model_path=path, num_threads=threads)
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self._lock = threading.Lock()
+        self._batch_size = None
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        # A TFLite interpreter is stateful, so calls are serialized per model
+        with self._lock:
+            if self._batch_size != batch.shape[0]:
+                self.interpreter.resize_tensor_input(self.input["index"], batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self.input["index"], batch.astype(self.input["dtype"], copy=False))
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output["index"]).copy()
+
+
+BACKENDS = {
+    "onnx": OnnxBackend,
+    "tflite": TFLiteBackend,
+}
+
+
+@dataclass
+class LoadedModel:
+    name: str
+    version: str
+    backend_name: str
+    backend: Any
+    classes: List[str]
+    input_size: int = 224
+    loaded_at: float = field(default_factory=time.time)
+    warmup_ms: float = 0.0
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.backend.predict(batch)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "backend": self.backend_name,
+            "classes": self.classes,
+            "input_size": self.input_size,
+            "loaded_at": self.loaded_at,
+            "warmup_ms": self.warmup_ms,
+        }
+
+
+class ModelRegistry:
+    """Versioned inference models that can be swapped without dropping requests.
+
+    A new version is fully loaded and warmed up before it replaces the active
+    one with a single reference assignment. Requests that already hold the old
+    `LoadedModel` finish on it; the next lookup sees the new one.
+
+    The active version is shared between worker processes through an
+    `ACTIVE` pointer file per model. `activate` writes it; every worker checks
+    it at most every MODEL_SYNC_INTERVAL seconds and loads the new version in
+    the background, serving the old one until the swap.
+    """
+
+    def __init__(self, model_dir: str, threads: int, sync_interval: float = None):
+        self.model_dir = model_dir
+        self.threads = threads
+        self.sync_interval = settings.MODEL_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self._active: Dict[str, LoadedModel] = {}
+        self._default_classes: Dict[str, List[str]] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._reloading: Dict[str, threading.Thread] = {}
+        self._load_lock = threading.Lock()
+
+    def versions(self, name: str) -> List[str]:
+        path = os.path.join(self.model_dir, name)
+        if not os.path.isdir(path):
+            return []
+        return sorted(v for v in os.listdir(path) if os.path.isdir(os.path.join(path, v)))
+
+    def _pointer_path(self, name: str) -> str:
+        return os.path.join(self.model_dir, name, "ACTIVE")
+
+    def pinned_version(self, name: str) -> Optional[str]:
+        """The version last activated for this model by any worker, if any."""
+        try:
+            with open(self._pointer_path(name)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def active(self, name: str) -> Optional[LoadedModel]:
+        model = self._active.get(name)
+        now = time.monotonic()
+        if now - self._checked_at.get(name, 0.0) >= self.sync_interval:
+            self._checked_at[name] = now
+            self._sync(name, model)
+        return model
+
+    def _sync(self, name: str, model: Optional[LoadedModel]) -> None:
+        pinned = self.pinned_version(name)
+        if pinned is None or (model is not None and model.version == pinned):
+            return
+        if name in self._reloading and self._reloading[name].is_alive():
+            return
+
+        def reload():
+            try:
+                self.load(name, pinned, self._default_classes.get(name))
+            except Exception as e:
+                logger.error(f"Failed to follow model {name} to version {pinned}: {str(e)}")
+
+        # Load off the request path; callers keep the current model until the swap
+        self._reloading[name] = threading.Thread(target=reload, name=f"model-sync-{name}", daemon=True)
+        self._reloading[name].start()
+
+    def activate(self, name: str, version: str, default_classes: Optional[List[str]] = None) -> LoadedModel:
+        """Load a version here, then point every other worker at it.
+
+        Raises ValueError for a name or version that is not a plain directory
+        name, and LookupError for a version that is not in the registry.
+        """
+        for label, value in (("name", name), ("version", version)):
+            if value in ("", ".", "..") or "/" in value or "\\" in value or "\0" in value:
+                raise ValueError(f"Invalid model {label} {value!r}")
+        if version not in self.versions(name):
+            raise LookupError(f"Model {name} version {version} not found")
+        model = self.load(name, version, default_classes)
+        tmp_path = f"{self._pointer_path(name)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, self._pointer_path(name))
+        return model
+
+    def load(self, name: str, version: str, default_classes: Optional[List[str]] = None) -> LoadedModel:
+        directory = os.path.join(self.model_dir, name, version)
+        backend_name = next(
+            (b for b, filename in BACKEND_FILES.items() if os.path.exists(os.path.join(directory, filename))),
+            None
+        )
+        if backend_name is None:
+            raise FileNotFoundError(f"No model artifact found in {directory}")
+
+        metadata = {}
+        metadata_path = os.path.join(directory, "metadata.json")
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+
+        if default_classes is not None:
+            self._default_classes[name] = list(default_classes)
+        with self._load_lock:
+            backend = BACKENDS[backend_name](os.path.join(directory, BACKEND_FILES[backend_name]), self.threads)
+            model = LoadedModel(
+                name=name,
+                version=version,
+                backend_name=backend_name,
+                backend=backend,
+                classes=metadata.get("classes") or list(default_classes or []),
+                input_size=metadata.get("input_size", 224),
+            )
+            # Warm up with a dummy batch so the first real request does not pay
+            # for lazy allocation and kernel selection
+            start = time.perf_counter()
+            model.predict(np.zeros((1, model.input_size, model.input_size, 3), dtype=np.float32))
+            model.warmup_ms = round((time.perf_counter() - start) * 1000, 2)
+
+            self._active[name] = model
+        logger.info(f"Activated model {name} version {version} ({backend_name}, warmup {model.warmup_ms} ms)")
+        return model
+
+    def load_latest(self, name: str, default_classes: Optional[List[str]] = None) -> Optional[LoadedModel]:
+        """Load the activated version, or the newest one when none has been activated."""
+        versions = self.versions(name)
+        if not versions:
+            logger.info(f"No artifacts for model {name} in {self.model_dir}")
+            return None
+        pinned = self.pinned_version(name)
+        return self.load(name, pinned if pinned in versions else versions[-1], default_classes)
+
+    def describe(self) -> Dict[str, Any]:
+        return {name: model.describe() for name, model in self._active.items()}
+
+
+class PredictionCache:
+    """Small LRU cache for prediction results keyed by model version and input digest."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_version: str, contents: bytes) -> Tuple[str, str]:
+        return model_version, hashlib.sha256(contents).hexdigest()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Any]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, str], value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+registry = ModelRegistry(settings.MODEL_DIR, settings.MODEL_INTRA_OP_THREADS)
+prediction_cache = PredictionCache(settings.PREDICTION_CACHE_SIZE)
@@ -0,0 +1,50 @@
+import logging
+import os
+from typing import Dict
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Weight arrays keyed by the real path of their .npy file. They are
+# memory-mapped read-only, so workers forked after `preload` share the same
+# physical pages through the page cache instead of holding private copies.
+_arrays: Dict[str, np.ndarray] = {}
+
+def preload(model_dir: str = None) -> int:
+    """Memory-map every .npy weight file under `model_dir`. Returns bytes mapped."""
+    model_dir = model_dir or settings.MODEL_DIR
+    mapped = 0
+    if not os.path.isdir(model_dir):
+        logger.info(f"Model directory {model_dir} not found, nothing to preload")
+        return mapped
+    count = 0
+    for root, _, files in os.walk(model_dir):
+        for filename in files:
+            if filename.endswith(".npy"):
+                mapped += get(os.path.join(root, filename)).nbytes
+                count += 1
+    logger.info(f"Preloaded {count} weight arrays ({mapped / 1e6:.1f} MB) from {model_dir}")
+    return mapped
+
+def get(path: str) -> np.ndarray:
+    """The shared read-only map of a .npy file, mapping it on first use."""
+    key = os.path.realpath(path)
+    if key not in _arrays:
+        _arrays[key] = np.load(key, mmap_mode="r")
+    return _arrays[key]
+
+def weights_for(directory: str) -> Dict[str, np.ndarray]:
+    """Mapped arrays in `<directory>/weights`, keyed by file stem (the ONNX initializer name)."""
+    weights_dir = os.path.join(directory, "weights")
+    if not os.path.isdir(weights_dir):
+        return {}
+    return {
+        filename[:-len(".npy")]: get(os.path.join(weights_dir, filename))
+        for filename in sorted(os.listdir(weights_dir)) if filename.endswith(".npy")
+    }
+
+def loaded() -> Dict[str, tuple]:
+    return {path: array.shape for path, array in _arrays.items()}
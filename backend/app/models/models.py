@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Table, Float, JSON, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, DateTime, Date, Text, Float, JSON, Boolean, Index, UniqueConstraint, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -34,6 +34,9 @@ class Patient(Base):
     hospital_id = Column(Integer, ForeignKey("hospitals.id"))
     researcher_id = Column(Integer, ForeignKey("researchers.id"))
     is_active = Column(Boolean, default=True)
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # set on soft delete; the purge worker deletes the row once the grace period has passed
+    mrn = Column(String, nullable=True)  # hospital's medical record number, the spreadsheet import key
+    import_hash = Column(String(32), nullable=True)  # digest of the normalized row from the last import
     
     hospital = relationship("Hospital", back_populates="patients")
     researcher = relationship("Researcher", back_populates="patients")
@@ -42,6 +45,22 @@ class Patient(Base):
     vitals = relationship("VitalSigns", back_populates="patient", uselist=False)
     skin_cancer_images = relationship("SkinCancerImage", back_populates="patient")
 
+    __table_args__ = (
+        # Partial indexes: listings only ever touch live rows, the purge worker only deleted ones
+        Index("ix_patients_live_hospital", "hospital_id", "id",
+              postgresql_where=is_active.is_(True), sqlite_where=is_active.is_(True)),
+        Index("ix_patients_deleted_at", "deleted_at",
+              postgresql_where=is_active.is_(False), sqlite_where=is_active.is_(False)),
+        UniqueConstraint("hospital_id", "mrn", name="uq_patients_hospital_mrn"),
+    )
+
+# The one test for a live patient, used by listings, counters and archiving alike; NULL is not live
+LIVE = Patient.is_active.is_(True)
+
+def is_live(patient) -> bool:
+    """Python-side twin of LIVE for loaded rows and snapshots."""
+    return patient.is_active is True
+
 class Scan(Base):
     __tablename__ = "scans"
     
@@ -50,10 +69,15 @@ class Scan(Base):
     date_uploaded = Column(DateTime, default=datetime.datetime.utcnow)
     file_path = Column(String)
     scan_type = Column(String)  # xray, mri, ct, etc.
-    patient_id = Column(Integer, ForeignKey("patients.id"))
+    patient_id = Column(Integer, ForeignKey("patients.id"), index=True)
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"))  # denormalized tenant key
     
     patient = relationship("Patient", back_populates="scans")
 
+    __table_args__ = (
+        Index("ix_scans_hospital_patient", "hospital_id", "patient_id"),
+    )
+
 class GeneticData(Base):
     __tablename__ = "genetic_data"
     
@@ -61,10 +85,21 @@ class GeneticData(Base):
     file_path = Column(String)
     upload_date = Column(DateTime, default=datetime.datetime.utcnow)
     analysis_result = Column(JSON)  # Store the analysis results including risk level and findings
-    patient_id = Column(Integer, ForeignKey("patients.id"))
+    # Typed copies of analysis_result fields, written together with it, for indexed risk queries
+    risk_level = Column(String, nullable=True)
+    risk_score = Column(Float, nullable=True)  # 0-100, same scale as analysis_result["risk_score"]
+    matched_markers = Column(String, nullable=True)  # comma-separated marker names
+    patient_id = Column(Integer, ForeignKey("patients.id"), index=True)
     
     patient = relationship("Patient", back_populates="genetic_data")
 
+    __table_args__ = (
+        # Covers "risk_level = ? AND risk_score >= ?" lookups returning patient ids
+        Index("ix_genetic_data_risk", "risk_level", "risk_score", "patient_id"),
+        # Covers "risk_score >= ?" on its own, which cannot seek on the index above
+        Index("ix_genetic_data_risk_score", "risk_score", "patient_id"),
+    )
+
 class Researcher(Base):
     __tablename__ = "researchers"
     
@@ -83,19 +118,85 @@ class VitalSigns(Base):
     temperature = Column(Float)
     oxygen_level = Column(Float)
     patient_id = Column(Integer, ForeignKey("patients.id"), unique=True)
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"))  # denormalized tenant key
     
     patient = relationship("Patient", back_populates="vitals")
 
+    __table_args__ = (
+        Index("ix_vital_signs_hospital_patient", "hospital_id", "patient_id"),
+    )
+
 class SkinCancerImage(Base):
     __tablename__ = "skin_cancer_images"
 
     id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, ForeignKey("patients.id"))
+    patient_id = Column(Integer, ForeignKey("patients.id"), index=True)
     image_path = Column(String, nullable=False)
     upload_date = Column(DateTime(timezone=True), server_default=func.now())
     prediction_result = Column(JSON, nullable=True)
     confidence_score = Column(Float, nullable=True)
     lesion_type = Column(String, nullable=True)
     recommendations = Column(Text, nullable=True)
+    # float16 image embedding (EMBEDDING_DIM values) used for similar-lesion search
+    embedding = Column(LargeBinary, nullable=True)
 
     patient = relationship("Patient", back_populates="skin_cancer_images")
+
+class HospitalSummary(Base):
+    __tablename__ = "hospital_summaries"
+
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"), primary_key=True)
+    total_patients = Column(Integer, nullable=False, default=0)
+    active_patients = Column(Integer, nullable=False, default=0)
+    critical_patients = Column(Integer, nullable=False, default=0)
+    recovered_patients = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class HospitalAdmissionDay(Base):
+    __tablename__ = "hospital_admission_days"
+
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    admissions = Column(Integer, nullable=False, default=0)
+
+class UploadSession(Base):
+    """A resumable upload; chunks are written straight into file_path at their offsets."""
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True)  # random token, also used in the upload URLs
+    patient_id = Column(Integer, ForeignKey("patients.id"), index=True)
+    kind = Column(String, nullable=False)  # "scan" or "genetic"
+    filename = Column(String, nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    sha256 = Column(String, nullable=True)  # optional whole-file checksum checked on completion
+    scan_type = Column(String, nullable=True)
+    about = Column(Text, nullable=True)
+    file_path = Column(String, nullable=False)  # preallocated part file, then the final location
+    status = Column(String, default="pending")  # pending, complete
+    record_id = Column(Integer, nullable=True)  # Scan or GeneticData id once complete
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class UploadChunk(Base):
+    __tablename__ = "upload_chunks"
+
+    session_id = Column(String, ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True)
+    index = Column(Integer, primary_key=True, autoincrement=False)
+    size = Column(Integer, nullable=False)
+    sha256 = Column(String, nullable=False)
+
+class ArchivedPatient(Base):
+    """Lookup index for patients moved to the Parquet archive (see archive_service)."""
+    __tablename__ = "archived_patients"
+
+    patient_id = Column(Integer, primary_key=True, autoincrement=False)
+    hospital_id = Column(Integer, index=True)
+    mrn = Column(String, nullable=True)
+    is_active = Column(Boolean, default=True)
+    # Copied from the patient so dashboard counters can be rebuilt without reading the archive
+    status = Column(String, nullable=True)
+    condition = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    batch = Column(String, nullable=False, index=True)  # directory under ARCHIVE_DIR holding the rows
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
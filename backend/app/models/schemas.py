@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, create_model
+from typing import List, Optional, Dict, Any, get_args, get_type_hints
 from datetime import datetime
 
 # Hospital schemas
@@ -38,6 +38,40 @@ class Patient(PatientBase):
     class Config:
         from_attributes = True
 
+# Columns a bulk update may set: the editable patient fields plus the assignments
+PATIENT_CHANGE_FIELDS = {**get_type_hints(PatientBase), "hospital_id": int, "researcher_id": Optional[int]}
+# Of those, the ones a change may not set to null
+PATIENT_REQUIRED_FIELDS = {name for name, hint in PATIENT_CHANGE_FIELDS.items() if type(None) not in get_args(hint)}
+# A partial patient: every change field optional, types as on PatientBase
+PatientChanges = create_model(
+    "PatientChanges", **{name: (Optional[hint], None) for name, hint in PATIENT_CHANGE_FIELDS.items()}
+)
+
+class PatientBulkUpdateItem(BaseModel):
+    id: int
+    changes: Dict[str, Any]
+
+class PatientBulkUpdate(BaseModel):
+    # Either explicit per-patient updates, or a filter plus one set of changes
+    updates: Optional[List[PatientBulkUpdateItem]] = None
+    filter: Optional[Dict[str, Any]] = None
+    changes: Optional[Dict[str, Any]] = None
+
+class PatientBulkUpdateResult(BaseModel):
+    id: int
+    status: str  # updated, not_found, rejected
+    detail: Optional[str] = None
+
+class PatientBulkUpdateResponse(BaseModel):
+    updated: int
+    results: List[PatientBulkUpdateResult]
+
+class PatientImportResult(BaseModel):
+    inserted: int
+    updated: int
+    removed: int
+    unchanged: int
+
 # Vital Signs schemas
 class VitalSignsBase(BaseModel):
     blood_pressure: Optional[str] = None
@@ -51,6 +85,7 @@ class VitalSignsCreate(VitalSignsBase):
 class VitalSigns(VitalSignsBase):
     id: int
     patient_id: int
+    hospital_id: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -68,6 +103,7 @@ class Scan(ScanBase):
     date_uploaded: datetime
     file_path: str
     patient_id: int
+    hospital_id: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -104,3 +140,41 @@ class Researcher(ResearcherBase):
     
     class Config:
         from_attributes = True
+
+# Hospital summary schemas
+class HospitalSummary(BaseModel):
+    hospital_id: int
+    total_patients: int = 0
+    active_patients: int = 0
+    critical_patients: int = 0
+    recovered_patients: int = 0
+    recent_admissions: int = 0
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Resumable upload schemas
+class UploadSessionCreate(BaseModel):
+    patient_id: int
+    kind: str = Field(..., pattern="^(scan|genetic)$")
+    filename: str
+    total_size: int = Field(..., gt=0)
+    chunk_size: Optional[int] = Field(None, gt=0)
+    sha256: Optional[str] = None
+    scan_type: Optional[str] = None
+    about: Optional[str] = None
+
+class UploadSessionStatus(BaseModel):
+    id: str
+    patient_id: int
+    kind: str
+    filename: str
+    total_size: int
+    chunk_size: int
+    total_chunks: int
+    received_chunks: int
+    received_bytes: int
+    missing_chunks: List[int]
+    status: str
+    record_id: Optional[int] = None
@@ -3,6 +3,7 @@ from .hospitals import router as hospitals_router
 from .patients import router as patients_router
 from .researchers import router as researchers_router
 from .ml import router as ml_router
+from .uploads import router as uploads_router
 
 router = APIRouter()
 
@@ -10,3 +11,4 @@ router.include_router(hospitals_router, prefix="/hospitals", tags=["hospitals"])
 router.include_router(patients_router, prefix="/patients", tags=["patients"])
 router.include_router(researchers_router, prefix="/researchers", tags=["researchers"])
 router.include_router(ml_router, prefix="/ml", tags=["ml"])
+router.include_router(uploads_router, prefix="/uploads", tags=["uploads"])
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.models.schemas import Hospital, HospitalCreate
+from app.models.schemas import Hospital, HospitalCreate, HospitalSummary, Patient, Scan, VitalSigns
 from ..models.models import Hospital as HospitalModel
 from ..database import get_db
+from ..services import summary_service, patient_service
+from ..tenancy import tenant_request_slot
 
 router = APIRouter()
 
@@ -27,3 +29,32 @@ def read_hospital(hospital_id: int, db: Session = Depends(get_db)):
     if db_hospital is None:
         raise HTTPException(status_code=404, detail="Hospital not found")
     return db_hospital
+
+@router.get("/{hospital_id}/summary", response_model=HospitalSummary)
+def read_hospital_summary(hospital_id: int, db: Session = Depends(get_db)):
+    db_hospital = db.query(HospitalModel).filter(HospitalModel.id == hospital_id).first()
+    if db_hospital is None:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+    return summary_service.get_hospital_summary(db, hospital_id)
+
+# Hospital-scoped clinical reads: every query leads with hospital_id
+@router.get("/{hospital_id}/patients", response_model=List[Patient], dependencies=[Depends(tenant_request_slot)])
+def read_hospital_patients(hospital_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+                           db: Session = Depends(get_db)):
+    return patient_service.get_hospital_patients(db, hospital_id, skip=skip, limit=limit, after_id=after_id)
+
+@router.get("/{hospital_id}/patients/{patient_id}", response_model=Patient, dependencies=[Depends(tenant_request_slot)])
+def read_hospital_patient(hospital_id: int, patient_id: int, db: Session = Depends(get_db)):
+    patient = patient_service.get_hospital_patient(db, hospital_id, patient_id)
+    if patient is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return patient
+
+@router.get("/{hospital_id}/scans", response_model=List[Scan], dependencies=[Depends(tenant_request_slot)])
+def read_hospital_scans(hospital_id: int, patient_id: Optional[int] = None, skip: int = 0, limit: int = 100,
+                        db: Session = Depends(get_db)):
+    return patient_service.get_hospital_scans(db, hospital_id, patient_id=patient_id, skip=skip, limit=limit)
+
+@router.get("/{hospital_id}/vitals", response_model=List[VitalSigns], dependencies=[Depends(tenant_request_slot)])
+def read_hospital_vitals(hospital_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return patient_service.get_hospital_vitals(db, hospital_id, skip=skip, limit=limit)
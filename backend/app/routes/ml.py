@@ -1,14 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 import numpy as np
 from PIL import Image
 import io
 import logging
+import math
 import base64
+import json
+import zipfile
 import pandas as pd
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional
+from itertools import islice
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import get_db
+from ..model_registry import registry, prediction_cache
+from ..models.models import SkinCancerImage
+from ..services import patient_service, skin_service
 
 router = APIRouter()  # Remove the prefix here since it's set in __init__.py
 
@@ -34,19 +46,53 @@ RISK_LEVELS = {
     'Low': 0.50
 }
 
-def preprocess_image(image: Image.Image) -> np.ndarray:
-    """Preprocess the image for model input."""
-    # Resize to 224x224 (standard input size for many CNN models)
-    image = image.resize((224, 224))
-    
-    # Convert to numpy array and normalize
-    img_array = np.array(image)
-    img_array = img_array.astype('float32') / 255.0
-    
-    # Add batch dimension
-    img_array = np.expand_dims(img_array, axis=0)
-    
-    return img_array
+# Registry name of the skin lesion classifier (artifacts under MODEL_DIR/skin/<version>)
+SKIN_MODEL_NAME = 'skin'
+
+# Used until a real classifier artifact is deployed
+MOCK_SKIN_PREDICTIONS = {
+    'akiec': 0.05,
+    'bcc': 0.10,
+    'bkl': 0.15,
+    'df': 0.05,
+    'mel': 0.05,
+    'nv': 0.55,
+    'vasc': 0.05
+}
+
+@router.on_event("startup")
+def load_models():
+    """Create the skin model session in each worker.
+
+    Inference sessions do not survive fork, but their externalized weights
+    come from the memory maps the gunicorn master preloaded, so workers share
+    one physical copy.
+    """
+    try:
+        registry.load_latest(SKIN_MODEL_NAME, default_classes=list(SKIN_CANCER_CLASSES))
+    except Exception as e:
+        logger.error(f"Failed to load skin model, falling back to mock predictions: {str(e)}")
+
+def preprocess_image(contents: bytes, size: int = 224) -> np.ndarray:
+    """Model input for one encoded image: a (1, size, size, 3) float batch in [0, 1].
+
+    Uses the same decoder as the batch endpoint, so a cached prediction does
+    not depend on which endpoint saw the image first.
+    """
+    return decode_image(contents, size)[np.newaxis].astype(np.float32) / 255.0
+
+# Embeddings are RGB thumbnails, so their length must be 3 * side * side
+EMBEDDING_SIDE = math.isqrt(settings.EMBEDDING_DIM // 3)
+if 3 * EMBEDDING_SIDE ** 2 != settings.EMBEDDING_DIM:
+    raise ValueError(f"EMBEDDING_DIM must be 3 * k * k for some integer k, got {settings.EMBEDDING_DIM}")
+
+def compute_embedding(image: Image.Image) -> np.ndarray:
+    """Compact appearance embedding: a mean-centered, L2-normalized colour thumbnail."""
+    side = EMBEDDING_SIDE
+    thumbnail = np.asarray(image.convert('RGB').resize((side, side), Image.BILINEAR), dtype=np.float32) / 255.0
+    thumbnail -= thumbnail.mean(axis=(0, 1))
+    vector = thumbnail.reshape(-1)
+    return vector / max(float(np.linalg.norm(vector)), 1e-6)
 
 def analyze_skin_cancer_prediction(prediction: Dict[str, float]) -> Dict[str, Any]:
     """Analyze the prediction results and provide detailed information."""
@@ -75,16 +121,55 @@ def analyze_skin_cancer_prediction(prediction: Dict[str, float]) -> Dict[str, An
         recommendations.append("Follow ABCDE rule for self-examination")
     
     return {
-        "type": SKIN_CANCER_CLASSES[class_name],
+        "type": SKIN_CANCER_CLASSES.get(class_name, class_name),
         "confidence": round(confidence * 100, 2),
         "risk_level": risk_level,
         "recommendations": recommendations,
         "class_code": class_name
     }
 
+def scores_to_predictions(scores: np.ndarray, classes: list) -> Dict[str, float]:
+    """Map raw model output to class probabilities, applying softmax to logits."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.min() < 0 or not np.isclose(scores.sum(), 1.0, atol=1e-3):
+        scores = np.exp(scores - scores.max())
+        scores /= scores.sum()
+    return {class_code: float(score) for class_code, score in zip(classes, scores)}
+
+@router.get("/models")
+def list_models():
+    """Active model versions and the versions available on disk."""
+    return {
+        "active": registry.describe(),
+        "available": {SKIN_MODEL_NAME: registry.versions(SKIN_MODEL_NAME)}
+    }
+
+@router.post("/models/{name}/activate")
+def activate_model(name: str, version: str):
+    """Load, warm up and swap in a model version here; other workers follow within MODEL_SYNC_INTERVAL."""
+    try:
+        model = registry.activate(name, version, default_classes=list(SKIN_CANCER_CLASSES))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to activate model {name} {version}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return model.describe()
+
 @router.post("/predict/skin")
-async def predict_skin_cancer(request: Request, file: UploadFile = File(...)):
-    """Endpoint for skin cancer prediction."""
+async def predict_skin_cancer(
+    request: Request,
+    file: UploadFile = File(...),
+    patient_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """Endpoint for skin cancer prediction.
+
+    With a patient_id the image, its analysis and embedding are stored so it
+    shows up in similar-lesion searches.
+    """
     try:
         # Log request details
         logger.info("Received skin cancer prediction request")
@@ -113,22 +198,33 @@ async def predict_skin_cancer(request: Request, file: UploadFile = File(...)):
         if image.mode != 'RGB':
             image = image.convert('RGB')
         
-        # Preprocess image
-        processed_image = preprocess_image(image)
-        
-        # Mock prediction (replace with actual model)
-        mock_predictions = {
-            'akiec': 0.05,
-            'bcc': 0.10,
-            'bkl': 0.15,
-            'df': 0.05,
-            'mel': 0.05,
-            'nv': 0.55,
-            'vasc': 0.05
-        }
+        # Resolve the active model once so a concurrent swap cannot mix versions
+        model = registry.active(SKIN_MODEL_NAME)
+        model_version = model.version if model else "mock"
         
-        # Analyze prediction
-        result = analyze_skin_cancer_prediction(mock_predictions)
+        cache_key = prediction_cache.key(model_version, contents)
+        result = prediction_cache.get(cache_key)
+        if result is None:
+            if model is None:
+                predictions = MOCK_SKIN_PREDICTIONS
+            else:
+                processed_image = preprocess_image(contents, model.input_size)
+                scores = await run_in_threadpool(model.predict, processed_image)
+                predictions = scores_to_predictions(scores[0], model.classes)
+            
+            # Analyze prediction
+            result = analyze_skin_cancer_prediction(predictions)
+            prediction_cache.put(cache_key, result)
+        
+        image_id = None
+        if patient_id is not None:
+            # Restoring an archived patient is blocking database and Parquet work
+            if await run_in_threadpool(patient_service.get_patient, db, patient_id, for_update=True) is None:
+                raise HTTPException(status_code=404, detail="Patient not found")
+            stored = await run_in_threadpool(
+                skin_service.store_skin_image, db, patient_id, contents, file.filename, result, compute_embedding(image)
+            )
+            image_id = stored.id
         
         # Convert processed image to base64
         buffered = io.BytesIO()
@@ -137,7 +233,9 @@ async def predict_skin_cancer(request: Request, file: UploadFile = File(...)):
         
         return JSONResponse(content={
             "prediction": result,
-            "processed_image": img_str
+            "processed_image": img_str,
+            "model_version": model_version,
+            "image_id": image_id
         })
         
     except HTTPException as he:
@@ -146,15 +244,193 @@ async def predict_skin_cancer(request: Request, file: UploadFile = File(...)):
         logger.error(f"Error in skin cancer prediction: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/skin/{image_id}/similar")
+def get_similar_lesions(
+    image_id: int,
+    k: int = Query(10, ge=1, le=100),
+    scope: str = Query("all", regex="^(all|patient)$"),
+    db: Session = Depends(get_db)
+):
+    """Stored lesions most similar to this image, across all patients or within its patient."""
+    image = db.query(SkinCancerImage).filter(SkinCancerImage.id == image_id).first()
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    if image.embedding is None:
+        raise HTTPException(status_code=409, detail="Image has no stored embedding")
+    return {
+        "image_id": image_id,
+        "scope": scope,
+        "results": skin_service.similar_images(db, image, k, scope)
+    }
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+_preprocess_pool = None
+
+def _get_preprocess_pool() -> ThreadPoolExecutor:
+    # Pillow releases the GIL while decoding and resizing, so threads scale here
+    global _preprocess_pool
+    if _preprocess_pool is None:
+        _preprocess_pool = ThreadPoolExecutor(max_workers=settings.PREPROCESS_WORKERS, thread_name_prefix="preprocess")
+    return _preprocess_pool
+
+def decode_image(contents: bytes, size: int) -> np.ndarray:
+    """Decode and resize one image to a uint8 (size, size, 3) array."""
+    image = Image.open(io.BytesIO(contents))
+    image.draft('RGB', (size, size))  # lets JPEG decode at reduced scale
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.asarray(image.resize((size, size)), dtype=np.uint8)
+
+class ImageTooLarge(ValueError):
+    pass
+
+class ImageSkipped(Exception):
+    """An image left unscored because the batch already holds MAX_BATCH_IMAGES."""
+
+def _read_capped(stream, budget: int) -> bytes:
+    """Read one image, enforcing the per-image cap and what is left of the request budget."""
+    limit = min(settings.MAX_BATCH_IMAGE_BYTES, budget)
+    # Read one byte past the limit so a member whose header understates its size is still caught
+    contents = stream.read(limit + 1)
+    if len(contents) > limit:
+        if limit < settings.MAX_BATCH_IMAGE_BYTES:
+            raise ImageTooLarge(f"Batch exceeds {settings.MAX_BATCH_TOTAL_BYTES} bytes of image data")
+        raise ImageTooLarge(f"Image exceeds {settings.MAX_BATCH_IMAGE_BYTES} bytes")
+    return contents
+
+def iter_upload_images(uploads: List[UploadFile], limit: Optional[int] = None) -> Iterator[Tuple[str, Any]]:
+    """Yield (name, bytes) for each uploaded image or ZIP archive member.
+
+    Archive members are decompressed one at a time into memory straight from
+    the uploaded (spooled) file; nothing is extracted to disk. Each image is
+    capped at MAX_BATCH_IMAGE_BYTES and the whole request at
+    MAX_BATCH_TOTAL_BYTES of decompressed data; an image over the cap is
+    yielded with an `ImageTooLarge` in place of its bytes. Images past the
+    first `limit` are not read at all and come with an `ImageSkipped`.
+    """
+    budget = settings.MAX_BATCH_TOTAL_BYTES
+    taken = 0
+    for upload in uploads:
+        upload.file.seek(0)
+        if upload.filename.lower().endswith('.zip') or upload.content_type in ('application/zip', 'application/x-zip-compressed'):
+            with zipfile.ZipFile(upload.file) as archive:
+                for info in archive.infolist():
+                    name = info.filename
+                    if info.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    if limit is not None and taken >= limit:
+                        yield name, ImageSkipped(f"Batch limit of {limit} images reached")
+                        continue
+                    taken += 1
+                    if info.file_size > settings.MAX_BATCH_IMAGE_BYTES:
+                        yield name, ImageTooLarge(f"Image exceeds {settings.MAX_BATCH_IMAGE_BYTES} bytes")
+                        continue
+                    try:
+                        with archive.open(info) as member:
+                            contents = _read_capped(member, budget)
+                    except ImageTooLarge as e:
+                        yield name, e
+                        continue
+                    budget -= len(contents)
+                    yield name, contents
+        elif limit is not None and taken >= limit:
+            yield upload.filename, ImageSkipped(f"Batch limit of {limit} images reached")
+        else:
+            taken += 1
+            try:
+                contents = _read_capped(upload.file, budget)
+            except ImageTooLarge as e:
+                yield upload.filename, e
+                continue
+            budget -= len(contents)
+            yield upload.filename, contents
+
+def _next_chunk(images: Iterator[Tuple[str, bytes]], size: int) -> List[Tuple[str, bytes]]:
+    return list(islice(images, size))
+
+def _score_chunk(chunk: List[Tuple[str, bytes]], model, offset: int) -> List[Dict[str, Any]]:
+    """Decode a chunk in parallel, stack it and score it in one model call."""
+    model_version = model.version if model else "mock"
+    size = model.input_size if model else 224
+    results: List[Optional[Dict[str, Any]]] = [None] * len(chunk)
+    pending = []
+    for i, (name, contents) in enumerate(chunk):
+        if isinstance(contents, ImageSkipped):
+            results[i] = {"index": offset + i, "filename": name, "skipped": str(contents)}
+            continue
+        if isinstance(contents, Exception):
+            results[i] = {"index": offset + i, "filename": name, "error": str(contents)}
+            continue
+        cached = prediction_cache.get(prediction_cache.key(model_version, contents))
+        if cached is not None:
+            results[i] = {"index": offset + i, "filename": name, "prediction": cached, "model_version": model_version}
+        else:
+            pending.append(i)
+
+    if pending:
+        futures = [_get_preprocess_pool().submit(decode_image, chunk[i][1], size) for i in pending]
+        decoded = []
+        for i, future in zip(pending, futures):
+            try:
+                decoded.append((i, future.result()))
+            except Exception as e:
+                results[i] = {"index": offset + i, "filename": chunk[i][0], "error": f"Invalid image format: {str(e)}"}
+
+        if decoded:
+            if model is None:
+                scored = [MOCK_SKIN_PREDICTIONS] * len(decoded)
+            else:
+                batch = np.stack([array for _, array in decoded]).astype(np.float32) / 255.0
+                scores = model.predict(batch)
+                scored = [scores_to_predictions(row, model.classes) for row in scores]
+            for (i, _), predictions in zip(decoded, scored):
+                result = analyze_skin_cancer_prediction(predictions)
+                prediction_cache.put(prediction_cache.key(model_version, chunk[i][1]), result)
+                results[i] = {"index": offset + i, "filename": chunk[i][0], "prediction": result, "model_version": model_version}
+    return results
+
+@router.post("/predict/skin/batch")
+async def predict_skin_cancer_batch(files: List[UploadFile] = File(...)):
+    """Batch skin cancer screening for many images or one ZIP archive.
+
+    Results are streamed back as NDJSON, one line per image, as each
+    vectorized batch completes. Images beyond MAX_BATCH_IMAGES get a
+    `skipped` line instead of a prediction so clients can resubmit them.
+    """
+    logger.info(f"Received batch skin cancer prediction request with {len(files)} upload(s)")
+    # One model for the whole session so every result carries the same version
+    model = registry.active(SKIN_MODEL_NAME)
+    images = iter_upload_images(files, limit=settings.MAX_BATCH_IMAGES)
+
+    async def stream_results():
+        offset = 0
+        while True:
+            chunk = await run_in_threadpool(_next_chunk, images, settings.SKIN_BATCH_SIZE)
+            if not chunk:
+                break
+            try:
+                results = await run_in_threadpool(_score_chunk, chunk, model, offset)
+            except Exception as e:
+                logger.error(f"Error in batch skin cancer prediction: {str(e)}")
+                results = [{"index": offset + i, "filename": name, "error": str(e)} for i, (name, _) in enumerate(chunk)]
+            offset += len(chunk)
+            yield "".join(json.dumps(result) + "\n" for result in results)
+        logger.info(f"Completed batch skin cancer prediction for {offset} images")
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 def analyze_genetic_data(df: pd.DataFrame) -> Dict[str, Any]:
     """Analyze genetic data and provide risk assessment."""
     try:
         # Calculate risk score based on genetic markers
         risk_score = 0
         markers = df.columns.tolist()
+        matched_markers = []
         
         # Analyze specific genetic markers
         for marker in markers:
+            marker = str(marker)
             if 'BRCA' in marker:
                 risk_score += 0.3
             elif 'TP53' in marker:
@@ -165,6 +441,9 @@ def analyze_genetic_data(df: pd.DataFrame) -> Dict[str, Any]:
                 risk_score += 0.15
             elif 'PTEN' in marker:
                 risk_score += 0.2
+            else:
+                continue
+            matched_markers.append(marker)
         
         # Normalize risk score
         risk_score = min(risk_score, 1.0)
@@ -208,7 +487,8 @@ def analyze_genetic_data(df: pd.DataFrame) -> Dict[str, Any]:
             "risk_score": round(risk_score * 100, 2),
             "findings": findings,
             "recommendations": recommendations,
-            "markers_analyzed": len(markers)
+            "markers_analyzed": len(markers),
+            "matched_markers": matched_markers
         }
         
     except Exception as e:
@@ -1,4 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import os
@@ -7,8 +10,13 @@ import json
 from datetime import datetime
 import pandas as pd
 from ..database import get_db
+from ..tenancy import tenant_import_slot
 from ..models import models, schemas
 from ..services import patient_service
+from ..services.summary_service import snapshot_patient, record_patient_changes
+from ..services.genetic_service import apply_analysis
+from ..services import import_service
+from ..services import archive_service
 import io
 from ..routes.ml import analyze_genetic_data
 
@@ -18,7 +26,12 @@ from ..models.models import Patient as PatientModel, Scan as ScanModel, GeneticD
 router = APIRouter()
 
 @router.post("/upload", response_model=List[schemas.Patient])
-async def upload_patients(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_patients(
+    file: UploadFile = File(...),
+    hospital_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    _slot: None = Depends(tenant_import_slot)
+):
     try:
         # Read the Excel file
         contents = await file.read()
@@ -35,7 +48,7 @@ async def upload_patients(file: UploadFile = File(...), db: Session = Depends(ge
                 name=patient_data.get('name', 'Unknown'),
                 age=patient_data.get('age', 0),
                 gender=patient_data.get('gender', 'Unknown'),
-                hospital_id=patient_data.get('hospital_id', 1),
+                hospital_id=patient_data.get('hospital_id', hospital_id or 1),
                 status=patient_data.get('status', 'active'),
                 condition=patient_data.get('condition', ''),
                 diagnosis=patient_data.get('diagnosis', ''),
@@ -81,6 +94,8 @@ async def upload_patients(file: UploadFile = File(...), db: Session = Depends(ge
             db.add(patient)
             patients.append(patient)
         
+        db.flush()  # applies the is_active default before the counters look at it
+        record_patient_changes(db, [(None, snapshot_patient(patient)) for patient in patients])
         db.commit()
         for patient in patients:
             db.refresh(patient)
@@ -90,9 +105,83 @@ async def upload_patients(file: UploadFile = File(...), db: Session = Depends(ge
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/import", response_model=schemas.PatientImportResult)
+async def import_patients(
+    hospital_id: int,
+    file: UploadFile = File(...),
+    mrn_column: str = "mrn",
+    remove_missing: bool = False,
+    db: Session = Depends(get_db),
+    _slot: None = Depends(tenant_import_slot)
+):
+    """Incremental re-import of a hospital's full patient spreadsheet keyed on MRN."""
+    if db.query(Hospital.id).filter(Hospital.id == hospital_id).first() is None:
+        raise HTTPException(status_code=404, detail="Hospital not found")
+    try:
+        contents = await file.read()
+        df = await run_in_threadpool(pd.read_excel, io.BytesIO(contents))
+        return await run_in_threadpool(
+            import_service.import_patients, db, hospital_id, df,
+            mrn_column=mrn_column, remove_missing=remove_missing
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.patch("/bulk", response_model=schemas.PatientBulkUpdateResponse)
+def bulk_update_patients(payload: schemas.PatientBulkUpdate, db: Session = Depends(get_db)):
+    if payload.updates is not None:
+        if payload.filter is not None or payload.changes is not None:
+            raise HTTPException(status_code=400, detail="Use either updates or filter with changes, not both")
+        updates = [item.dict() for item in payload.updates]
+    elif payload.filter and payload.changes:
+        unknown = sorted(set(payload.filter) - patient_service.BULK_UPDATE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Cannot filter on: {', '.join(unknown)}")
+        patient_ids = patient_service.patient_ids_matching(db, payload.filter)
+        updates = [{"id": patient_id, "changes": payload.changes} for patient_id in patient_ids]
+    else:
+        raise HTTPException(status_code=400, detail="Provide updates, or a non-empty filter and changes")
+    
+    try:
+        results = patient_service.bulk_update_patients(db, updates)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "updated": sum(1 for result in results if result["status"] == "updated"),
+        "results": results
+    }
+
+# Columns a client may project with ?fields=, i.e. those of the Patient schema
+PROJECTABLE_FIELDS = list(schemas.Patient.model_fields)
+
 @router.get("/", response_model=List[schemas.Patient])
-def get_patients(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return patient_service.get_patients(db, skip=skip, limit=limit)
+def get_patients(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    genetic_risk: Optional[str] = None,
+    min_score: Optional[float] = None,
+    db: Session = Depends(get_db)
+):
+    # genetic_risk (High/Medium/Low) and min_score (0-100) are answered from the genetic_data risk indexes
+    if fields is None:
+        return patient_service.get_patients(db, skip=skip, limit=limit, genetic_risk=genetic_risk, min_score=min_score)
+    
+    # Projection fast path: fetch only the requested columns and encode the rows
+    # with orjson directly; the columns are trusted, so per-row validation is skipped
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in PROJECTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    names = ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+    rows = patient_service.get_patient_rows(db, names, skip=skip, limit=limit,
+                                            genetic_risk=genetic_risk, min_score=min_score)
+    return ORJSONResponse([dict(zip(names, row)) for row in rows])
 
 @router.get("/{patient_id}", response_model=schemas.Patient)
 def get_patient(patient_id: int, db: Session = Depends(get_db)):
@@ -118,6 +207,8 @@ def create_patient(patient_data: dict = Body(...), db: Session = Depends(get_db)
         )
         
         db.add(patient)
+        db.flush()
+        record_patient_changes(db, [(None, snapshot_patient(patient))])
         db.commit()
         db.refresh(patient)
         
@@ -126,6 +217,7 @@ def create_patient(patient_data: dict = Body(...), db: Session = Depends(get_db)
             vitals_data = patient_data['vitals']
             vitals = models.VitalSigns(
                 patient_id=patient.id,
+                hospital_id=patient.hospital_id,
                 blood_pressure=vitals_data.get('bloodPressure', ''),
                 heart_rate=vitals_data.get('heartRate', 0),
                 temperature=vitals_data.get('temperature', 0.0),
@@ -142,9 +234,10 @@ def create_patient(patient_data: dict = Body(...), db: Session = Depends(get_db)
 @router.put("/{patient_id}", response_model=schemas.Patient)
 def update_patient(patient_id: int, patient_data: dict = Body(...), db: Session = Depends(get_db)):
     try:
-        patient = patient_service.get_patient(db, patient_id)
+        patient = patient_service.get_patient(db, patient_id, for_update=True)
         if patient is None:
             raise HTTPException(status_code=404, detail="Patient not found")
+        before = snapshot_patient(patient)
         
         # Update basic information
         for key, value in patient_data.items():
@@ -159,6 +252,9 @@ def update_patient(patient_id: int, patient_data: dict = Body(...), db: Session
         if 'genetics' in patient_data:
             patient.genetics = patient_data['genetics']
         
+        if patient.hospital_id != before["hospital_id"]:
+            patient_service.move_patient_records(db, [patient.id], patient.hospital_id)
+        record_patient_changes(db, [(before, snapshot_patient(patient))])
         db.commit()
         db.refresh(patient)
         return patient
@@ -166,6 +262,19 @@ def update_patient(patient_id: int, patient_data: dict = Body(...), db: Session
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{patient_id}/restore", response_model=schemas.Patient)
+def restore_patient(patient_id: int, db: Session = Depends(get_db)):
+    """Move an archived patient and its records back into the hot tables."""
+    try:
+        if not archive_service.restore_patients(db, [patient_id]):
+            raise HTTPException(status_code=404, detail="Archived patient not found")
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    return db.query(PatientModel).filter(PatientModel.id == patient_id).first()
+
 @router.delete("/{patient_id}")
 def delete_patient(patient_id: int, db: Session = Depends(get_db)):
     patient = patient_service.get_patient(db, patient_id)
@@ -176,7 +285,7 @@ def delete_patient(patient_id: int, db: Session = Depends(get_db)):
 @router.post("/{patient_id}/vitals", response_model=VitalSigns)
 def create_or_update_vitals(patient_id: int, vitals: VitalSignsCreate, db: Session = Depends(get_db)):
     # Verify patient exists
-    db_patient = db.query(PatientModel).filter(PatientModel.id == patient_id).first()
+    db_patient = patient_service.get_patient(db, patient_id, for_update=True)
     if db_patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
     
@@ -189,8 +298,10 @@ def create_or_update_vitals(patient_id: int, vitals: VitalSignsCreate, db: Sessi
             setattr(db_vitals, key, value)
     else:
         # Create new vitals
-        db_vitals = VitalSignsModel(**vitals.dict())
+        db_vitals = VitalSignsModel(**vitals.dict(), hospital_id=db_patient.hospital_id)
         db.add(db_vitals)
+    # Vitals have no timestamp of their own; this keeps the patient off the archive's stale list
+    db_patient.updated_at = func.now()
     
     db.commit()
     db.refresh(db_vitals)
@@ -205,7 +316,7 @@ def create_patient_scan(
     db: Session = Depends(get_db)
 ):
     # Verify patient exists
-    db_patient = db.query(PatientModel).filter(PatientModel.id == patient_id).first()
+    db_patient = patient_service.get_patient(db, patient_id, for_update=True)
     if db_patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
     
@@ -221,7 +332,8 @@ def create_patient_scan(
         about=about,
         scan_type=scan_type,
         file_path=file_location,
-        patient_id=patient_id
+        patient_id=patient_id,
+        hospital_id=db_patient.hospital_id
     )
     db.add(db_scan)
     db.commit()
@@ -236,7 +348,7 @@ async def upload_genetic_data(
 ):
     try:
         # Verify patient exists
-        patient = db.query(Patient).filter(Patient.id == patient_id).first()
+        patient = await run_in_threadpool(patient_service.get_patient, db, patient_id, for_update=True)
         if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
             
@@ -263,18 +375,17 @@ async def upload_genetic_data(
         analysis_result = analyze_genetic_data(df)
         
         # Create or update genetic data record
-        genetic_data = db.query(GeneticData).filter(GeneticData.patient_id == patient_id).first()
+        genetic_data = db.query(GeneticDataModel).filter(GeneticDataModel.patient_id == patient_id).first()
         if genetic_data:
             genetic_data.file_path = file_path
             genetic_data.upload_date = datetime.utcnow()
-            genetic_data.analysis_result = analysis_result
         else:
-            genetic_data = GeneticData(
+            genetic_data = GeneticDataModel(
                 patient_id=patient_id,
-                file_path=file_path,
-                analysis_result=analysis_result
+                file_path=file_path
             )
             db.add(genetic_data)
+        apply_analysis(genetic_data, analysis_result)
             
         db.commit()
         
@@ -283,5 +394,8 @@ async def upload_genetic_data(
             "analysis": analysis_result
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
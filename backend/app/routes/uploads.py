@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional
+import logging
+from ..database import get_db
+from ..models.models import UploadSession
+from ..models.schemas import UploadSessionCreate, UploadSessionStatus
+from ..services import patient_service, upload_service
+from ..services.upload_service import UploadError
+from ..routes.ml import analyze_genetic_data
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+def _get_session(db: Session, session_id: str) -> UploadSession:
+    session = db.query(UploadSession).filter(UploadSession.id == session_id).first()
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+@router.post("/", response_model=UploadSessionStatus, status_code=201)
+def create_upload(spec: UploadSessionCreate, db: Session = Depends(get_db)):
+    """Start a resumable scan or genetic data upload for a patient."""
+    patient = patient_service.get_patient(db, spec.patient_id, for_update=True)
+    if patient is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    try:
+        session = upload_service.create_session(db, patient, spec)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return upload_service.session_status(db, session)
+
+@router.put("/{session_id}/chunks/{index}")
+async def upload_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    offset: Optional[int] = None,
+    x_chunk_sha256: str = Header(...),
+    db: Session = Depends(get_db)
+):
+    """Write one chunk (raw request body). Re-sending a chunk is safe."""
+    session = await run_in_threadpool(_get_session, db, session_id)
+    try:
+        chunk = await upload_service.write_chunk(db, session, index, request.stream(), x_chunk_sha256, offset)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        logger.error(f"Error writing chunk {index} of upload {session_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"index": index, "size": chunk.size, "sha256": chunk.sha256}
+
+@router.get("/{session_id}", response_model=UploadSessionStatus)
+def get_upload(session_id: str, db: Session = Depends(get_db)):
+    """Progress of an upload, including which chunks still need to be sent."""
+    return upload_service.session_status(db, _get_session(db, session_id))
+
+@router.post("/{session_id}/complete", response_model=UploadSessionStatus)
+async def complete_upload(session_id: str, db: Session = Depends(get_db)):
+    """Attach the assembled file to a new Scan or the patient's GeneticData record."""
+    session = await run_in_threadpool(_get_session, db, session_id)
+    try:
+        session = await run_in_threadpool(upload_service.complete_session, db, session, analyze_genetic_data)
+    except UploadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error completing upload {session_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return await run_in_threadpool(upload_service.session_status, db, session)
+
+@router.delete("/{session_id}", status_code=204)
+def abort_upload(session_id: str, db: Session = Depends(get_db)):
+    upload_service.abort_session(db, _get_session(db, session_id))
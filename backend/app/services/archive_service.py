@@ -0,0 +1,247 @@
+"""Cold storage for inactive and long-untouched patients.
+
+A batch of patients and every row they own (scans, genetic data, vitals,
+skin images) is written to one directory of zstd-compressed Parquet files
+under ARCHIVE_DIR, one file per table, sorted by patient id in small row
+groups. `archived_patients` is the lookup index from patient id to batch.
+The rows are then deleted from the hot tables in the same transaction that
+writes the lookup rows, so a patient is always in exactly one place.
+
+Archived live patients stay in the hospital dashboard counters: archiving
+moves their rows, it does not discharge them, so neither archiving nor
+restoring touches the counters.
+
+`load_patient` reads an archived patient back (used by
+`patient_service.get_patient`), and `restore_patients` moves patients back
+into the hot tables (`stage_restore`/`finish_restore` split it around a
+caller's own commit). Archived images leave the similarity index and are
+re-added on restore.
+"""
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import JSON, and_, delete, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.models import (
+    Patient, Scan, GeneticData, VitalSigns, SkinCancerImage, UploadSession, UploadChunk, ArchivedPatient, LIVE, is_live
+)
+from ..similarity import index
+
+logger = logging.getLogger(__name__)
+
+# Archived tables; children first so deletes never trip a foreign key
+CHILD_MODELS = (Scan, GeneticData, VitalSigns, SkinCancerImage)
+ARCHIVED_MODELS = CHILD_MODELS + (Patient,)
+
+# Child rows whose writes count as activity on their patient. Vitals carry no
+# timestamp; writing them touches the patient's updated_at instead.
+ACTIVITY_COLUMNS = (Scan.date_uploaded, GeneticData.upload_date, SkinCancerImage.upload_date)
+
+def _key(model) -> str:
+    # Column holding the patient id in each archived table
+    return "id" if model is Patient else "patient_id"
+
+def _batch_dir(batch: str) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, batch)
+
+def _to_archive(model, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # JSON documents are stored as text so Parquet does not infer a struct per batch
+    json_columns = [c.name for c in model.__table__.columns if isinstance(c.type, JSON)]
+    for row in rows:
+        for name in json_columns:
+            if row[name] is not None:
+                row[name] = json.dumps(row[name])
+    return rows
+
+def _from_archive(model, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    columns = {c.name: c for c in model.__table__.columns}
+    for row in rows:
+        for name in list(row):
+            if name not in columns:
+                del row[name]
+            elif isinstance(columns[name].type, JSON) and row[name] is not None:
+                row[name] = json.loads(row[name])
+    return rows
+
+def _write_table(path: str, model, rows: List[Dict[str, Any]]) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = sorted(_to_archive(model, rows), key=lambda row: (row[_key(model)], row["id"]))
+    columns = [c.name for c in model.__table__.columns]
+    table = pa.Table.from_pylist(rows) if rows else pa.table({name: pa.array([], pa.null()) for name in columns})
+    pq.write_table(table, path, compression="zstd", row_group_size=settings.ARCHIVE_ROW_GROUP_SIZE)
+
+def _read_table(batch: str, model, patient_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    import pyarrow.parquet as pq
+
+    path = os.path.join(_batch_dir(batch), f"{model.__tablename__}.parquet")
+    if pq.ParquetFile(path).metadata.num_rows == 0:
+        return []
+    ids = sorted(set(patient_ids))
+    # Row-group statistics on the sorted key let the reader skip every other patient
+    table = pq.read_table(path, filters=[(_key(model), "in", ids)])
+    return _from_archive(model, table.to_pylist())
+
+def archive_candidates(db: Session, limit: int, after_days: Optional[int] = None) -> List[int]:
+    """Ids of patients due for archiving.
+
+    Inactive patients without a pending purge (no deleted_at) and live
+    patients untouched for ARCHIVE_AFTER_DAYS qualify; a new scan, genetic
+    upload or skin image counts as touching the patient. Soft-deleted
+    patients are left for the purge worker, and patients with an upload in
+    progress stay hot until it finishes.
+    """
+    after_days = settings.ARCHIVE_AFTER_DAYS if after_days is None else after_days
+    cutoff = datetime.now(timezone.utc) - timedelta(days=after_days)
+    uploading = select(UploadSession.patient_id).where(UploadSession.status == "pending")
+    recently_active = [
+        # Naive columns hold UTC
+        Patient.id.notin_(select(column.table.c.patient_id).where(
+            column >= (cutoff if column.type.timezone else cutoff.replace(tzinfo=None))
+        ))
+        for column in ACTIVITY_COLUMNS
+    ]
+    return [patient_id for (patient_id,) in db.query(Patient.id).filter(
+        or_(
+            Patient.is_active.is_(False) & Patient.deleted_at.is_(None),
+            and_(LIVE, func.coalesce(Patient.updated_at, Patient.created_at) < cutoff, *recently_active)
+        ),
+        Patient.id.notin_(uploading)
+    ).order_by(Patient.id).limit(limit)]
+
+def archive_batch(db: Session, patient_ids: List[int]) -> Dict[str, int]:
+    """Write one batch of patients to Parquet, then drop them from the hot tables."""
+    if not patient_ids:
+        return {"patients": 0, "rows": 0}
+    batch = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    tmp_dir = _batch_dir(batch) + ".tmp"
+    os.makedirs(tmp_dir)
+
+    rows = 0
+    patients, image_ids = [], []
+    try:
+        for model in ARCHIVED_MODELS:
+            table = model.__table__
+            records = [dict(row) for row in db.execute(
+                select(table).where(getattr(table.c, _key(model)).in_(patient_ids))
+            ).mappings()]
+            if model is Patient:
+                patients = [dict(record) for record in records]
+            elif model is SkinCancerImage:
+                image_ids = [record["id"] for record in records]
+            rows += len(records)
+            _write_table(os.path.join(tmp_dir, f"{table.name}.parquet"), model, records)
+        # The batch only becomes visible once every file is complete
+        os.rename(tmp_dir, _batch_dir(batch))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    try:
+        db.execute(insert(ArchivedPatient), [
+            {"patient_id": p["id"], "hospital_id": p["hospital_id"], "mrn": p["mrn"],
+             "is_active": is_live(Patient(**p)), "status": p["status"], "condition": p["condition"],
+             "created_at": p["created_at"], "batch": batch}
+            for p in patients
+        ])
+        finished = select(UploadSession.id).where(UploadSession.patient_id.in_(patient_ids))
+        db.execute(delete(UploadChunk).where(UploadChunk.session_id.in_(finished)))
+        db.execute(delete(UploadSession).where(UploadSession.patient_id.in_(patient_ids)))
+        for model in ARCHIVED_MODELS:
+            db.query(model).filter(getattr(model, _key(model)).in_(patient_ids)).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        shutil.rmtree(_batch_dir(batch), ignore_errors=True)
+        raise
+    index.remove(image_ids)
+    return {"patients": len(patients), "rows": rows}
+
+def archive_patients(db: Session, batch_size: int = None, after_days: int = None,
+                     max_batches: int = None, pause_seconds: float = 0.5) -> Dict[str, int]:
+    """Archive due patients in batches until none are left (or max_batches is reached)."""
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    totals = {"patients": 0, "rows": 0, "batches": 0}
+    while max_batches is None or totals["batches"] < max_batches:
+        result = archive_batch(db, archive_candidates(db, batch_size, after_days))
+        if not result["patients"]:
+            break
+        totals["batches"] += 1
+        totals["patients"] += result["patients"]
+        totals["rows"] += result["rows"]
+        logger.info(f"Archived {result['patients']} patients ({result['rows']} rows)")
+        time.sleep(pause_seconds)
+    return totals
+
+def load_patient(db: Session, patient_id: int) -> Optional[Patient]:
+    """An archived live patient with its records, as detached objects, or None."""
+    entry = db.get(ArchivedPatient, patient_id)
+    if entry is None or not entry.is_active:
+        return None
+    rows = _read_table(entry.batch, Patient, [patient_id])
+    if not rows:
+        return None
+    patient = Patient(**rows[0])
+    children = {model: [model(**row) for row in _read_table(entry.batch, model, [patient_id])] for model in CHILD_MODELS}
+    patient.scans = children[Scan]
+    patient.genetic_data = children[GeneticData]
+    patient.vitals = children[VitalSigns][0] if children[VitalSigns] else None
+    patient.skin_cancer_images = children[SkinCancerImage]
+    return patient
+
+def stage_restore(db: Session, patient_ids: Iterable[int]) -> Dict[str, Any]:
+    """Move archived patients and their records back into the hot tables without committing.
+
+    The caller commits, then passes the result to `finish_restore`; rolling
+    back instead leaves the patients archived.
+    """
+    entries = db.query(ArchivedPatient).filter(ArchivedPatient.patient_id.in_(list(patient_ids))).all()
+    by_batch: Dict[str, List[int]] = defaultdict(list)
+    for entry in entries:
+        by_batch[entry.batch].append(entry.patient_id)
+
+    restored, images = [], []
+    for batch, ids in by_batch.items():
+        for model in ARCHIVED_MODELS[::-1]:  # parents first on the way back in
+            rows = _read_table(batch, model, ids)
+            if rows:
+                db.execute(insert(model.__table__), rows)
+            if model is Patient:
+                restored.extend(rows)
+            elif model is SkinCancerImage:
+                images.extend(rows)
+    if entries:
+        db.query(ArchivedPatient).filter(ArchivedPatient.patient_id.in_([e.patient_id for e in entries])).delete(
+            synchronize_session=False
+        )
+    return {"patients": len(restored), "batches": list(by_batch), "images": images}
+
+def finish_restore(db: Session, staged: Dict[str, Any]) -> int:
+    """Post-commit half of a restore: re-index images and drop emptied batches. Returns patients restored."""
+    index.add_many((row["id"], np.frombuffer(row["embedding"], dtype=np.float16))
+                   for row in staged["images"] if row["embedding"] is not None)
+
+    # Batch files are immutable; drop a batch once nothing points into it
+    for batch in staged["batches"]:
+        if not db.query(ArchivedPatient.patient_id).filter(ArchivedPatient.batch == batch).first():
+            shutil.rmtree(_batch_dir(batch), ignore_errors=True)
+    return staged["patients"]
+
+def restore_patients(db: Session, patient_ids: Iterable[int]) -> int:
+    """Move archived patients and their records back into the hot tables. Returns patients restored."""
+    staged = stage_restore(db, patient_ids)
+    if not staged["patients"]:
+        return 0
+    db.commit()
+    return finish_restore(db, staged)
@@ -0,0 +1,44 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+from ..models.models import GeneticData
+
+def apply_analysis(genetic_data: GeneticData, analysis_result: Dict[str, Any]) -> None:
+    """Store an analysis result and its indexed risk columns together."""
+    genetic_data.analysis_result = analysis_result
+    genetic_data.risk_level = analysis_result.get("risk_level")
+    genetic_data.risk_score = analysis_result.get("risk_score")
+    markers = analysis_result.get("matched_markers")
+    genetic_data.matched_markers = ",".join(markers) if markers is not None else None
+
+def risk_patient_ids(risk_level: Optional[str] = None, min_score: Optional[float] = None):
+    """Subquery of patient ids matching a genetic risk filter.
+
+    Served by ix_genetic_data_risk when risk_level is given and by
+    ix_genetic_data_risk_score for a min_score-only filter.
+    """
+    query = select(GeneticData.patient_id)
+    if risk_level is not None:
+        query = query.where(GeneticData.risk_level == risk_level)
+    if min_score is not None:
+        query = query.where(GeneticData.risk_score >= min_score)
+    return query
+
+def backfill_risk_columns(db: Session, batch_size: int = 1000) -> int:
+    """Populate risk columns for rows written before they existed. Returns rows updated."""
+    updated = 0
+    last_id = 0
+    while True:
+        rows = db.query(GeneticData).filter(
+            GeneticData.id > last_id,
+            GeneticData.risk_level.is_(None),
+            GeneticData.analysis_result.isnot(None)
+        ).order_by(GeneticData.id).limit(batch_size).all()
+        if not rows:
+            return updated
+        for genetic_data in rows:
+            if isinstance(genetic_data.analysis_result, dict):
+                apply_analysis(genetic_data, genetic_data.analysis_result)
+                updated += 1
+        last_id = rows[-1].id
+        db.commit()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pandas as pd
+from sqlalchemy import insert, update, bindparam, func
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.models import Patient, ArchivedPatient
+from . import archive_service
+from .summary_service import snapshot_patient, record_patient_changes
+
+# Spreadsheet columns copied onto the patient row (and covered by the row hash)
+IMPORT_FIELDS = (
+    "name", "age", "gender", "status", "condition", "diagnosis",
+    "treatment", "medical_history", "existing_diseases", "disease_diagnosed",
+)
+# Integer columns among them; spreadsheets deliver these as text or floats too
+NUMERIC_FIELDS = ("age",)
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def normalize_rows(df: pd.DataFrame, mrn_column: str) -> Dict[str, Dict[str, Any]]:
+    """Normalized import rows keyed by MRN; the last row wins for duplicate MRNs."""
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    mrn_column = mrn_column.lower()
+    if mrn_column not in df.columns:
+        raise ValueError(f"Missing MRN column '{mrn_column}'")
+    for field in IMPORT_FIELDS:
+        if field not in df.columns:
+            df[field] = None
+    df = df[[mrn_column, *IMPORT_FIELDS]].astype(object).where(df[[mrn_column, *IMPORT_FIELDS]].notna(), None)
+
+    rows = {}
+    for record in df.itertuples(index=False, name=None):
+        mrn, values = record[0], record[1:]
+        if mrn is None or str(mrn).strip() == "":
+            continue
+        row = {}
+        for field, value in zip(IMPORT_FIELDS, values):
+            if isinstance(value, str):
+                value = value.strip() or None
+            if field in NUMERIC_FIELDS and value is not None:
+                # "40", 40 and 40.0 must hash alike or every re-import rewrites the row
+                try:
+                    value = int(float(value))
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid {field} '{value}' for MRN {mrn}")
+            row[field] = value
+        row["status"] = row["status"] or "active"
+        rows[str(mrn).strip()] = row
+    return rows
+
+def row_hash(row: Dict[str, Any]) -> str:
+    payload = json.dumps([row[field] for field in IMPORT_FIELDS], default=str, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+def _upsert(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Batched INSERT ... ON CONFLICT (hospital_id, mrn) DO UPDATE where the dialect has it."""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    for chunk in _chunks(rows, settings.IMPORT_BATCH_SIZE):
+        if dialect_insert is None:
+            db.execute(insert(Patient), chunk)
+            continue
+        statement = dialect_insert(Patient.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=["hospital_id", "mrn"],
+            set_={
+                **{field: statement.excluded[field] for field in (*IMPORT_FIELDS, "import_hash")},
+                "is_active": True,
+                "deleted_at": None,
+                "updated_at": func.now(),
+            }
+        )
+        db.execute(statement, chunk)
+
+def import_patients(db: Session, hospital_id: int, df: pd.DataFrame, mrn_column: str = "mrn",
+                    remove_missing: bool = False) -> Dict[str, int]:
+    """Apply a full hospital spreadsheet as a diff against the previous import.
+
+    Each normalized row is hashed; only rows whose MRN is new or whose hash
+    changed are written (batched upserts). With remove_missing, live patients
+    whose MRN is no longer in the sheet are soft-deleted. Unchanged rows are
+    never touched.
+    """
+    incoming = normalize_rows(df, mrn_column)
+    # Archived patients listed in the sheet come back hot so they are diffed, not duplicated.
+    # The restore is part of this transaction: a failed import leaves them archived.
+    archived = [patient_id for (patient_id,) in db.query(ArchivedPatient.patient_id).filter(
+        ArchivedPatient.hospital_id == hospital_id, ArchivedPatient.mrn.in_(list(incoming))
+    )] if incoming else []
+    restored = archive_service.stage_restore(db, archived) if archived else None
+    existing = {
+        row.mrn: row for row in db.query(
+            Patient.id, Patient.mrn, Patient.import_hash, Patient.hospital_id, Patient.status,
+            Patient.condition, Patient.is_active, Patient.created_at
+        ).filter(Patient.hospital_id == hospital_id, Patient.mrn.isnot(None))
+    }
+
+    upserts: List[Dict[str, Any]] = []
+    changes = []
+    counts = {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    for mrn, row in incoming.items():
+        digest = row_hash(row)
+        current = existing.get(mrn)
+        if current is not None and current.import_hash == digest and current.is_active:
+            counts["unchanged"] += 1
+            continue
+        counts["updated" if current is not None else "inserted"] += 1
+        upserts.append({**row, "hospital_id": hospital_id, "mrn": mrn, "import_hash": digest, "is_active": True})
+        after = SimpleNamespace(hospital_id=hospital_id, status=row["status"], condition=row["condition"],
+                                is_active=True, created_at=current.created_at if current is not None else None)
+        changes.append((snapshot_patient(current), snapshot_patient(after)))
+
+    if upserts:
+        new_rows = [row for row in upserts if row["mrn"] not in existing]
+        changed_rows = [row for row in upserts if row["mrn"] in existing]
+        if db.bind.dialect.name in ("postgresql", "sqlite"):
+            _upsert(db, upserts)
+        else:
+            _upsert(db, new_rows)
+            for chunk in _chunks(changed_rows, settings.IMPORT_BATCH_SIZE):
+                db.execute(
+                    update(Patient.__table__)
+                    .where(Patient.__table__.c.hospital_id == hospital_id, Patient.__table__.c.mrn == bindparam("_mrn"))
+                    .values({field: bindparam(f"_{field}") for field in (*IMPORT_FIELDS, "import_hash", "is_active")}),
+                    [{f"_{key}": value for key, value in row.items()} for row in chunk]
+                )
+
+    if remove_missing:
+        removed = [mrn for mrn, row in existing.items() if row.is_active and mrn not in incoming]
+        now = datetime.now(timezone.utc)
+        for chunk in _chunks(removed, settings.IMPORT_BATCH_SIZE):
+            db.query(Patient).filter(Patient.hospital_id == hospital_id, Patient.mrn.in_(chunk)).update(
+                {Patient.is_active: False, Patient.deleted_at: now}, synchronize_session=False
+            )
+        for mrn in removed:
+            current = existing[mrn]
+            after = SimpleNamespace(hospital_id=hospital_id, status=current.status, condition=current.condition,
+                                    is_active=False, created_at=current.created_at)
+            changes.append((snapshot_patient(current), snapshot_patient(after)))
+        counts["removed"] = len(removed)
+
+    record_patient_changes(db, changes)
+    db.commit()
+    if restored is not None:
+        archive_service.finish_restore(db, restored)
+    return counts
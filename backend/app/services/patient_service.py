@@ -1,17 +1,185 @@
+from sqlalchemy import update, bindparam, select
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from ..models.models import Patient
+from collections import defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from ..models.models import Patient, Scan, VitalSigns, ArchivedPatient, LIVE
+from ..models.schemas import PatientChanges, PATIENT_CHANGE_FIELDS, PATIENT_REQUIRED_FIELDS
+from .summary_service import snapshot_patient, record_patient_changes
+from .genetic_service import risk_patient_ids
+from . import archive_service
 
-def get_patients(db: Session, skip: int = 0, limit: int = 100) -> List[Patient]:
-    return db.query(Patient).offset(skip).limit(limit).all()
+# Columns a bulk update may touch: the editable patient fields plus assignments
+BULK_UPDATE_FIELDS = set(PATIENT_CHANGE_FIELDS)
 
-def get_patient(db: Session, patient_id: int) -> Optional[Patient]:
-    return db.query(Patient).filter(Patient.id == patient_id).first()
+# Columns the hospital summary counters depend on
+SUMMARY_COLUMNS = (Patient.id, Patient.hospital_id, Patient.status, Patient.condition, Patient.is_active, Patient.created_at)
+
+def _patient_filters(genetic_risk: Optional[str], min_score: Optional[float]) -> list:
+    filters = [LIVE]
+    if genetic_risk is not None or min_score is not None:
+        filters.append(Patient.id.in_(risk_patient_ids(genetic_risk, min_score)))
+    return filters
+
+def get_patients(db: Session, skip: int = 0, limit: int = 100, genetic_risk: Optional[str] = None,
+                 min_score: Optional[float] = None) -> List[Patient]:
+    return db.query(Patient).filter(*_patient_filters(genetic_risk, min_score)).order_by(Patient.id) \
+        .offset(skip).limit(limit).all()
+
+def get_patient_rows(db: Session, fields: List[str], skip: int = 0, limit: int = 100,
+                     genetic_risk: Optional[str] = None, min_score: Optional[float] = None) -> List[tuple]:
+    """Selected columns of live patients as plain tuples, skipping ORM object loading."""
+    columns = [getattr(Patient, field) for field in fields]
+    return [tuple(row) for row in db.execute(
+        select(*columns).where(*_patient_filters(genetic_risk, min_score)).order_by(Patient.id).offset(skip).limit(limit)
+    )]
+
+def get_patient(db: Session, patient_id: int, for_update: bool = False) -> Optional[Patient]:
+    """A live patient, falling back to the cold archive when it is not in the hot table.
+
+    Archived patients come back as detached read-only objects; with
+    for_update=True they are restored into the hot tables first so the
+    caller can modify them and add records.
+    """
+    patient = db.query(Patient).filter(Patient.id == patient_id, LIVE).first()
+    if patient is not None or db.get(ArchivedPatient, patient_id) is None:
+        return patient
+    if not for_update:
+        return archive_service.load_patient(db, patient_id)
+    archive_service.restore_patients(db, [patient_id])
+    return db.query(Patient).filter(Patient.id == patient_id, LIVE).first()
 
 def delete_patient(db: Session, patient_id: int) -> bool:
-    patient = get_patient(db, patient_id)
+    """Soft delete: hide the patient now, the purge worker removes data later."""
+    patient = get_patient(db, patient_id, for_update=True)
     if patient:
-        db.delete(patient)
+        before = snapshot_patient(patient)
+        patient.is_active = False
+        patient.deleted_at = datetime.now(timezone.utc)
+        record_patient_changes(db, [(before, snapshot_patient(patient))])
         db.commit()
         return True
-    return False 
\ No newline at end of file
+    return False
+
+def validate_changes(changes: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Coerce one set of bulk changes to the patient column types.
+
+    Returns the cleaned changes, or None and the reason they were rejected.
+    """
+    unknown = sorted(set(changes) - BULK_UPDATE_FIELDS)
+    if unknown:
+        return None, f"Fields not allowed: {', '.join(unknown)}"
+    if not changes:
+        return None, "No changes given"
+    nulls = sorted(name for name in PATIENT_REQUIRED_FIELDS if name in changes and changes[name] is None)
+    if nulls:
+        return None, f"Fields cannot be null: {', '.join(nulls)}"
+    try:
+        parsed = PatientChanges(**changes)
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+    return {name: getattr(parsed, name) for name in changes}, None
+
+def bulk_update_patients(db: Session, updates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Apply many `{id, changes}` patient updates in one transaction.
+
+    Rows sharing identical changes are written with a single
+    `UPDATE ... WHERE id IN (...)`; rows that set the same columns to
+    different values share one executemany statement. Only the columns the
+    hospital counters need are read beforehand, never full rows.
+    """
+    outcomes: Dict[int, Dict[str, Any]] = {}
+    accepted: Dict[int, Dict[str, Any]] = {}
+    for item in updates:
+        patient_id = item["id"]
+        changes, error = validate_changes(item["changes"])
+        if error:
+            outcomes[patient_id] = {"id": patient_id, "status": "rejected", "detail": error}
+        else:
+            accepted[patient_id] = changes
+
+    existing = {row.id: row for row in db.query(*SUMMARY_COLUMNS).filter(Patient.id.in_(list(accepted)), LIVE)} if accepted else {}
+    for patient_id in set(accepted) - set(existing):
+        outcomes[patient_id] = {"id": patient_id, "status": "not_found", "detail": "Patient not found"}
+        del accepted[patient_id]
+
+    # Group identical change sets, then rows that touch the same columns
+    same_values: Dict[tuple, List[int]] = defaultdict(list)
+    for patient_id, changes in accepted.items():
+        same_values[tuple(sorted(changes.items(), key=lambda kv: kv[0]))].append(patient_id)
+    same_columns: Dict[tuple, List[Dict[str, Any]]] = defaultdict(list)
+    for values, ids in same_values.items():
+        if len(ids) > 1:
+            db.execute(update(Patient).where(Patient.id.in_(ids), LIVE).values(dict(values)).execution_options(synchronize_session=False))
+        else:
+            same_columns[tuple(k for k, _ in values)].append({"_id": ids[0], **{f"_{k}": v for k, v in values}})
+    for columns, rows in same_columns.items():
+        statement = update(Patient.__table__).where(Patient.__table__.c.id == bindparam("_id")).values(
+            {column: bindparam(f"_{column}") for column in columns}
+        )
+        db.execute(statement, rows)
+
+    changes = []
+    for patient_id, patient_changes in accepted.items():
+        before = existing[patient_id]
+        after = SimpleNamespace(**{column.key: getattr(before, column.key) for column in SUMMARY_COLUMNS})
+        for key, value in patient_changes.items():
+            if hasattr(after, key):
+                setattr(after, key, value)
+        changes.append((snapshot_patient(before), snapshot_patient(after)))
+        outcomes[patient_id] = {"id": patient_id, "status": "updated", "detail": None}
+    record_patient_changes(db, changes)
+
+    moved: Dict[int, List[int]] = defaultdict(list)
+    for patient_id, patient_changes in accepted.items():
+        if "hospital_id" in patient_changes and patient_changes["hospital_id"] != existing[patient_id].hospital_id:
+            moved[patient_changes["hospital_id"]].append(patient_id)
+    for hospital_id, patient_ids in moved.items():
+        move_patient_records(db, patient_ids, hospital_id)
+
+    db.commit()
+    return [outcomes[item["id"]] for item in updates]
+
+def move_patient_records(db: Session, patient_ids: List[int], hospital_id: int) -> None:
+    """Keep the denormalized tenant key on scans and vitals in step with the patient."""
+    for model in (Scan, VitalSigns):
+        db.query(model).filter(model.patient_id.in_(patient_ids)).update(
+            {model.hospital_id: hospital_id}, synchronize_session=False
+        )
+
+def get_hospital_patients(db: Session, hospital_id: int, skip: int = 0, limit: int = 100,
+                          after_id: Optional[int] = None) -> List[Patient]:
+    """Live patients of one hospital, served from the (hospital_id, id) partial index.
+
+    Pass the last id of the previous page as `after_id` for keyset paging,
+    which stays cheap on deep pages where OFFSET does not.
+    """
+    query = db.query(Patient).filter(Patient.hospital_id == hospital_id, LIVE).order_by(Patient.id)
+    if after_id is not None:
+        query = query.filter(Patient.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def get_hospital_patient(db: Session, hospital_id: int, patient_id: int) -> Optional[Patient]:
+    return db.query(Patient).filter(Patient.hospital_id == hospital_id, Patient.id == patient_id, LIVE).first()
+
+def get_hospital_scans(db: Session, hospital_id: int, patient_id: Optional[int] = None,
+                       skip: int = 0, limit: int = 100) -> List[Scan]:
+    query = db.query(Scan).filter(Scan.hospital_id == hospital_id)
+    if patient_id is not None:
+        query = query.filter(Scan.patient_id == patient_id)
+    return query.order_by(Scan.patient_id, Scan.id).offset(skip).limit(limit).all()
+
+def get_hospital_vitals(db: Session, hospital_id: int, skip: int = 0, limit: int = 100) -> List[VitalSigns]:
+    return db.query(VitalSigns).filter(VitalSigns.hospital_id == hospital_id).order_by(
+        VitalSigns.patient_id
+    ).offset(skip).limit(limit).all()
+
+def patient_ids_matching(db: Session, filters: Dict[str, Any]) -> List[int]:
+    query = db.query(Patient.id).filter(LIVE)
+    for key, value in filters.items():
+        query = query.filter(getattr(Patient, key) == value)
+    return [patient_id for (patient_id,) in query]
@@ -0,0 +1,86 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.models import Patient, Scan, GeneticData, VitalSigns, SkinCancerImage, UploadSession, UploadChunk
+
+logger = logging.getLogger(__name__)
+
+# Dependent tables and the column holding an on-disk file, if any
+DEPENDENTS = (
+    (Scan, Scan.file_path),
+    (GeneticData, GeneticData.file_path),
+    (SkinCancerImage, SkinCancerImage.image_path),
+    (VitalSigns, None),
+    (UploadSession, UploadSession.file_path),
+)
+
+def _remove_upload(path: str) -> bool:
+    """Delete a file only if it lives under UPLOAD_DIR."""
+    if not path:
+        return False
+    root = os.path.realpath(settings.UPLOAD_DIR)
+    target = os.path.realpath(path)
+    if os.path.commonpath([root, target]) != root:
+        logger.warning(f"Not removing {path}: outside {settings.UPLOAD_DIR}")
+        return False
+    try:
+        os.remove(target)
+        return True
+    except FileNotFoundError:
+        return False
+
+def purge_batch(db: Session, batch_size: int, grace: timedelta) -> Dict[str, int]:
+    """Hard-delete one batch of soft-deleted patients and everything they own.
+
+    Rows go in one short transaction; files are removed after the commit so
+    a rollback never leaves rows pointing at missing files.
+    """
+    cutoff = datetime.now(timezone.utc) - grace
+    patient_ids: List[int] = [
+        patient_id for (patient_id,) in db.query(Patient.id)
+        .filter(Patient.is_active.is_(False), Patient.deleted_at <= cutoff)
+        .order_by(Patient.deleted_at)
+        .limit(batch_size)
+    ]
+    if not patient_ids:
+        return {"patients": 0, "rows": 0, "files": 0}
+
+    files: List[str] = []
+    rows = db.query(UploadChunk).filter(
+        UploadChunk.session_id.in_(db.query(UploadSession.id).filter(UploadSession.patient_id.in_(patient_ids)))
+    ).delete(synchronize_session=False)
+    for model, file_column in DEPENDENTS:
+        if file_column is not None:
+            files.extend(path for (path,) in db.query(file_column).filter(model.patient_id.in_(patient_ids)))
+        rows += db.query(model).filter(model.patient_id.in_(patient_ids)).delete(synchronize_session=False)
+    db.query(Patient).filter(Patient.id.in_(patient_ids)).delete(synchronize_session=False)
+    db.commit()
+
+    removed = sum(_remove_upload(path) for path in files)
+    return {"patients": len(patient_ids), "rows": rows, "files": removed}
+
+def purge_deleted_patients(db: Session, batch_size: int = None, grace_hours: float = None,
+                           pause_seconds: float = None, max_batches: int = None) -> Dict[str, int]:
+    """Purge soft-deleted patients in throttled batches until none are due."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    grace = timedelta(hours=settings.PURGE_GRACE_HOURS if grace_hours is None else grace_hours)
+    pause_seconds = settings.PURGE_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+
+    totals = {"patients": 0, "rows": 0, "files": 0, "batches": 0}
+    while max_batches is None or totals["batches"] < max_batches:
+        result = purge_batch(db, batch_size, grace)
+        if not result["patients"]:
+            break
+        totals["batches"] += 1
+        for key, value in result.items():
+            totals[key] += value
+        logger.info(f"Purged {result['patients']} patients, {result['rows']} dependent rows, {result['files']} files")
+        # Yield to request traffic between batches
+        time.sleep(pause_seconds)
+    return totals
@@ -0,0 +1,99 @@
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.models import Patient, SkinCancerImage, LIVE
+from ..similarity import index
+
+def store_skin_image(db: Session, patient_id: int, contents: bytes, filename: str,
+                     result: Dict[str, Any], embedding: np.ndarray) -> SkinCancerImage:
+    """Persist an analyzed image and its embedding, then add it to the similarity index."""
+    os.makedirs(settings.SKIN_IMAGE_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    digest = hashlib.sha256(contents).hexdigest()[:12]
+    extension = os.path.splitext(filename or "")[1].lower() or ".jpg"
+    image_path = os.path.join(settings.SKIN_IMAGE_DIR, f"patient_{patient_id}_{timestamp}_{digest}{extension}")
+    with open(image_path, "wb") as buffer:
+        buffer.write(contents)
+
+    image = SkinCancerImage(
+        patient_id=patient_id,
+        image_path=image_path,
+        prediction_result=result,
+        confidence_score=result["confidence"] / 100,
+        lesion_type=result["class_code"],
+        recommendations="\n".join(result.get("recommendations", [])),
+        embedding=embedding.astype(np.float16).tobytes()
+    )
+    db.add(image)
+    db.commit()
+    db.refresh(image)
+    # Only indexed once committed, so a search never returns an id the database lacks
+    index.add(image.id, embedding)
+    return image
+
+def _describe(image: SkinCancerImage, similarity: float) -> Dict[str, Any]:
+    return {
+        "image_id": image.id,
+        "patient_id": image.patient_id,
+        "similarity": similarity,
+        "lesion_type": image.lesion_type,
+        "confidence_score": image.confidence_score,
+        "upload_date": image.upload_date.isoformat() if image.upload_date else None,
+    }
+
+def similar_images(db: Session, image: SkinCancerImage, k: int, scope: str = "all") -> List[Dict[str, Any]]:
+    """Most similar stored lesions to `image`, best first.
+
+    scope="patient" scores this patient's own images directly; scope="all"
+    goes through the shared index. Purged or soft-deleted patients' images
+    are dropped when the hits are joined back to the database.
+    """
+    query = np.frombuffer(image.embedding, dtype=np.float16).astype(np.float32)
+    if scope == "patient":
+        rows = db.query(SkinCancerImage.id, SkinCancerImage.embedding).filter(
+            SkinCancerImage.patient_id == image.patient_id,
+            SkinCancerImage.id != image.id,
+            SkinCancerImage.embedding.isnot(None)
+        ).all()
+        if not rows:
+            return []
+        vectors = np.stack([np.frombuffer(embedding, dtype=np.float16) for _, embedding in rows]).astype(np.float32)
+        scores = vectors @ query
+        order = np.argsort(-scores)[:k]
+        hits = [(rows[i].id, round(float(scores[i]), 4)) for i in order]
+    else:
+        # Over-fetch so hits on since-deleted images still leave k results
+        hits = index.search(query, k * 2 + 8, exclude_ids=[image.id])
+
+    if not hits:
+        return []
+    images = {
+        row.id: row for row in db.query(SkinCancerImage)
+        .join(Patient, Patient.id == SkinCancerImage.patient_id)
+        .filter(SkinCancerImage.id.in_([image_id for image_id, _ in hits]), LIVE)
+    }
+    return [_describe(images[image_id], score) for image_id, score in hits if image_id in images][:k]
+
+def rebuild_index(db: Session, ivf: bool = False, batch_size: int = 1000) -> Dict[str, Optional[int]]:
+    """Rewrite the similarity index from stored embeddings, optionally training IVF lists."""
+    def rows():
+        last_id = 0
+        while True:
+            batch = db.query(SkinCancerImage.id, SkinCancerImage.embedding).filter(
+                SkinCancerImage.id > last_id, SkinCancerImage.embedding.isnot(None)
+            ).order_by(SkinCancerImage.id).limit(batch_size).all()
+            if not batch:
+                return
+            for image_id, embedding in batch:
+                yield image_id, np.frombuffer(embedding, dtype=np.float16)
+            last_id = batch[-1].id
+
+    count = index.rebuild(rows())
+    lists = index.train_ivf() if ivf and count else None
+    return {"images": count, "lists": lists}
@@ -0,0 +1,181 @@
+from sqlalchemy import func, case, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+from ..models.models import Patient, ArchivedPatient, HospitalSummary, HospitalAdmissionDay, LIVE, is_live
+
+# Number of days counted as "recent" admissions on the dashboard
+RECENT_ADMISSION_DAYS = 7
+
+COUNTER_FIELDS = ("total_patients", "active_patients", "critical_patients", "recovered_patients")
+
+def utc_day(moment: Optional[datetime] = None) -> date:
+    """Calendar day in UTC, the clock `created_at` is written with; naive values are taken as UTC."""
+    if moment is None:
+        return datetime.now(timezone.utc).date()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+def snapshot_patient(patient: Optional[Patient]) -> Optional[Dict]:
+    """Capture the fields the hospital counters depend on.
+
+    Take one snapshot before and one after mutating a patient and pass both to
+    `record_patient_changes` in the same transaction.
+    """
+    if patient is None:
+        return None
+    return {
+        "hospital_id": patient.hospital_id,
+        "status": patient.status,
+        "condition": patient.condition,
+        "is_active": is_live(patient),
+        "admitted_on": utc_day(patient.created_at),
+    }
+
+def _counts(snapshot: Optional[Dict]) -> Counter:
+    counts = Counter()
+    if snapshot is None or snapshot["hospital_id"] is None or not snapshot["is_active"]:
+        return counts
+    status = (snapshot["status"] or "").lower()
+    condition = (snapshot["condition"] or "").lower()
+    counts["total_patients"] = 1
+    counts["active_patients"] = int(status == "active")
+    counts["critical_patients"] = int(condition == "critical")
+    counts["recovered_patients"] = int(condition == "recovered")
+    return counts
+
+def _admission_key(snapshot: Optional[Dict]) -> Optional[Tuple[int, date]]:
+    if snapshot is None or snapshot["hospital_id"] is None or not snapshot["is_active"]:
+        return None
+    return snapshot["hospital_id"], snapshot["admitted_on"]
+
+def _insert_missing(db: Session, model, values: Dict) -> None:
+    """INSERT a zeroed counter row unless it exists; safe against concurrent first writes."""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        db.execute(dialect_insert(model.__table__).values(**values).on_conflict_do_nothing())
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(model.__table__).values(**values))
+    except IntegrityError:
+        pass  # another transaction created it first
+
+def _ensure_summary(db: Session, hospital_id: int) -> None:
+    if db.get(HospitalSummary, hospital_id) is None:
+        _insert_missing(db, HospitalSummary, {"hospital_id": hospital_id, **{field: 0 for field in COUNTER_FIELDS}})
+
+def record_patient_changes(db: Session, changes: Iterable[Tuple[Optional[Dict], Optional[Dict]]]) -> None:
+    """Apply counter deltas for a set of (before, after) patient snapshots.
+
+    Use `None` as `before` for a created patient and as `after` for a deleted
+    one. Deltas are aggregated per hospital and written as in-place increments
+    without committing, so they land in the caller's transaction.
+    """
+    deltas: Dict[int, Counter] = defaultdict(Counter)
+    admissions: Counter = Counter()
+    for before, after in changes:
+        if before is not None:
+            deltas[before["hospital_id"]].subtract(_counts(before))
+        if after is not None:
+            deltas[after["hospital_id"]].update(_counts(after))
+        old_key, new_key = _admission_key(before), _admission_key(after)
+        if old_key != new_key:
+            if old_key is not None:
+                admissions[old_key] -= 1
+            if new_key is not None:
+                admissions[new_key] += 1
+
+    for hospital_id, delta in deltas.items():
+        values = {
+            getattr(HospitalSummary, field): getattr(HospitalSummary, field) + delta[field]
+            for field in COUNTER_FIELDS if delta[field]
+        }
+        if hospital_id is None or not values:
+            continue
+        _ensure_summary(db, hospital_id)
+        db.query(HospitalSummary).filter(HospitalSummary.hospital_id == hospital_id).update(
+            values, synchronize_session=False
+        )
+
+    for (hospital_id, day), delta in admissions.items():
+        if not delta:
+            continue
+        if db.get(HospitalAdmissionDay, (hospital_id, day)) is None:
+            _insert_missing(db, HospitalAdmissionDay, {"hospital_id": hospital_id, "day": day, "admissions": 0})
+        db.query(HospitalAdmissionDay).filter(
+            HospitalAdmissionDay.hospital_id == hospital_id,
+            HospitalAdmissionDay.day == day
+        ).update(
+            {HospitalAdmissionDay.admissions: HospitalAdmissionDay.admissions + delta},
+            synchronize_session=False
+        )
+
+def get_hospital_summary(db: Session, hospital_id: int) -> Dict:
+    summary = db.get(HospitalSummary, hospital_id)
+    since = utc_day() - timedelta(days=RECENT_ADMISSION_DAYS - 1)
+    recent = db.query(func.coalesce(func.sum(HospitalAdmissionDay.admissions), 0)).filter(
+        HospitalAdmissionDay.hospital_id == hospital_id,
+        HospitalAdmissionDay.day >= since
+    ).scalar()
+
+    result = {field: getattr(summary, field) if summary else 0 for field in COUNTER_FIELDS}
+    result.update({
+        "hospital_id": hospital_id,
+        "recent_admissions": int(recent or 0),
+        "updated_at": summary.updated_at if summary else None,
+    })
+    return result
+
+def rebuild_hospital_summaries(db: Session) -> int:
+    """Recompute every hospital's counters from the patients table.
+
+    Live patients moved to the archive are counted from archived_patients.
+    This is the reconciliation job for drift caused by writes that bypass the
+    API (manual SQL, restores). Returns the number of hospitals rebuilt.
+    """
+    totals: Dict[int, Counter] = defaultdict(Counter)
+    admissions: Counter = Counter()
+    for model, live in ((Patient, LIVE), (ArchivedPatient, ArchivedPatient.is_active.is_(True))):
+        status = func.lower(func.coalesce(model.status, ""))
+        condition = func.lower(func.coalesce(model.condition, ""))
+        rows = db.query(
+            model.hospital_id,
+            func.count(),
+            func.sum(case((status == "active", 1), else_=0)),
+            func.sum(case((condition == "critical", 1), else_=0)),
+            func.sum(case((condition == "recovered", 1), else_=0)),
+        ).filter(live, model.hospital_id.isnot(None)).group_by(model.hospital_id).all()
+        for hospital_id, *counts in rows:
+            totals[hospital_id].update(dict(zip(COUNTER_FIELDS, (count or 0 for count in counts))))
+
+        created_at = model.created_at
+        if db.bind.dialect.name == "postgresql":
+            # timestamptz would otherwise be cut into days in the session time zone
+            created_at = func.timezone("UTC", created_at)
+        admission_day = func.date(created_at)
+        for hospital_id, day, count in db.query(model.hospital_id, admission_day, func.count()).filter(
+            live, model.hospital_id.isnot(None), model.created_at.isnot(None)
+        ).group_by(model.hospital_id, admission_day):
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            admissions[hospital_id, day] += count
+
+    db.query(HospitalSummary).delete(synchronize_session=False)
+    db.query(HospitalAdmissionDay).delete(synchronize_session=False)
+    for hospital_id, counts in totals.items():
+        db.add(HospitalSummary(hospital_id=hospital_id, **{field: counts[field] for field in COUNTER_FIELDS}))
+    for (hospital_id, day), count in admissions.items():
+        db.add(HospitalAdmissionDay(hospital_id=hospital_id, day=day, admissions=count))
+    db.commit()
+    return len(totals)
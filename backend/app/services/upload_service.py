@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import os
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Optional
+
+import pandas as pd
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.models import UploadSession, UploadChunk, Scan, GeneticData, Patient
+from ..models.schemas import UploadSessionCreate
+from .genetic_service import apply_analysis
+
+logger = logging.getLogger(__name__)
+
+GENETIC_EXTENSIONS = ('.xls', '.xlsx')
+
+# Body pieces are gathered up to this size before each (threaded) pwrite
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+class UploadError(ValueError):
+    """A client-side protocol error (bad offset, size or checksum)."""
+
+def _incoming_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "incoming")
+
+def total_chunks(session: UploadSession) -> int:
+    return -(-session.total_size // session.chunk_size)
+
+def chunk_length(session: UploadSession, index: int) -> int:
+    return min(session.chunk_size, session.total_size - index * session.chunk_size)
+
+def create_session(db: Session, patient: Patient, spec: UploadSessionCreate) -> UploadSession:
+    """Register an upload and preallocate its part file at the final size."""
+    if spec.total_size > settings.MAX_UPLOAD_SIZE:
+        raise UploadError(f"File exceeds the {settings.MAX_UPLOAD_SIZE} byte upload limit")
+    chunk_size = spec.chunk_size or settings.UPLOAD_CHUNK_SIZE
+    if chunk_size > settings.MAX_UPLOAD_CHUNK_SIZE:
+        raise UploadError(f"Chunk size exceeds {settings.MAX_UPLOAD_CHUNK_SIZE} bytes")
+    if spec.kind == "genetic" and not spec.filename.endswith(GENETIC_EXTENSIONS):
+        raise UploadError("File must be an Excel file (.xls or .xlsx)")
+
+    session_id = secrets.token_hex(16)
+    os.makedirs(_incoming_dir(), exist_ok=True)
+    file_path = os.path.join(_incoming_dir(), f"{session_id}.part")
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        # Reserve the blocks up front so a full disk fails here, not mid-upload
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, spec.total_size)
+        else:
+            os.ftruncate(fd, spec.total_size)
+    except OSError:
+        os.close(fd)
+        os.remove(file_path)
+        raise
+    os.close(fd)
+
+    session = UploadSession(
+        id=session_id,
+        patient_id=patient.id,
+        kind=spec.kind,
+        filename=os.path.basename(spec.filename),
+        total_size=spec.total_size,
+        chunk_size=chunk_size,
+        sha256=spec.sha256.lower() if spec.sha256 else None,
+        scan_type=spec.scan_type,
+        about=spec.about,
+        file_path=file_path
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+def _write_block(fd: int, data: bytes, position: int, digest) -> int:
+    # Hashing and pwrite both release the GIL, so blocks run off the event loop
+    digest.update(data)
+    view = memoryview(data)
+    while view:
+        done = os.pwrite(fd, view, position)
+        view, position = view[done:], position + done
+    return len(data)
+
+async def write_chunk(db: Session, session: UploadSession, index: int, body: AsyncIterator[bytes],
+                      checksum: str, offset: Optional[int] = None) -> UploadChunk:
+    """Stream one chunk body into its slot of the part file and record it once verified.
+
+    The body is written with pwrite as it arrives, at most WRITE_BUFFER_SIZE
+    at a time; file and database work runs in the threadpool so the event
+    loop only waits on the network. A chunk that fails its length or checksum
+    check is not recorded and can simply be sent again.
+    """
+    if session.status != "pending":
+        raise UploadError("Upload is already complete")
+    if not 0 <= index < total_chunks(session):
+        raise UploadError(f"Chunk index must be between 0 and {total_chunks(session) - 1}")
+    start = index * session.chunk_size
+    if offset is not None and offset != start:
+        raise UploadError(f"Chunk {index} starts at offset {start}, not {offset}")
+    expected = chunk_length(session, index)
+
+    digest = hashlib.sha256()
+    written = 0
+    pending = bytearray()
+    fd = await run_in_threadpool(os.open, session.file_path, os.O_WRONLY)
+    try:
+        async for piece in body:
+            if written + len(pending) + len(piece) > expected:
+                raise UploadError(f"Chunk {index} is larger than {expected} bytes")
+            pending += piece
+            if len(pending) >= WRITE_BUFFER_SIZE:
+                written += await run_in_threadpool(_write_block, fd, bytes(pending), start + written, digest)
+                pending.clear()
+        if pending:
+            written += await run_in_threadpool(_write_block, fd, bytes(pending), start + written, digest)
+    finally:
+        os.close(fd)
+    if written != expected:
+        raise UploadError(f"Chunk {index} has {written} bytes, expected {expected}")
+    if digest.hexdigest() != checksum.lower():
+        raise UploadError(f"Checksum mismatch for chunk {index}")
+    return await run_in_threadpool(_record_chunk, db, session, index, written, digest.hexdigest())
+
+def _record_chunk(db: Session, session: UploadSession, index: int, size: int, sha256: str) -> UploadChunk:
+    chunk = UploadChunk(session_id=session.id, index=index, size=size, sha256=sha256)
+    try:
+        db.merge(chunk)
+        session.updated_at = func.now()  # keeps an active upload clear of expiry
+        db.commit()
+    except IntegrityError:
+        # A concurrent retry of the same chunk recorded it first; the bytes are identical
+        db.rollback()
+    return chunk
+
+def session_status(db: Session, session: UploadSession) -> Dict:
+    received = {index: size for index, size in db.query(UploadChunk.index, UploadChunk.size)
+                .filter(UploadChunk.session_id == session.id)}
+    return {
+        "id": session.id,
+        "patient_id": session.patient_id,
+        "kind": session.kind,
+        "filename": session.filename,
+        "total_size": session.total_size,
+        "chunk_size": session.chunk_size,
+        "total_chunks": total_chunks(session),
+        "received_chunks": len(received),
+        "received_bytes": sum(received.values()),
+        "missing_chunks": [i for i in range(total_chunks(session)) if i not in received],
+        "status": session.status,
+        "record_id": session.record_id,
+    }
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def complete_session(db: Session, session: UploadSession, analyze_genetic=None) -> UploadSession:
+    """Move the assembled file into place and attach it to a Scan or GeneticData row.
+
+    The part file already holds every chunk at its offset, so completing is a
+    rename rather than a copy. Completing twice returns the same record.
+    """
+    if session.status == "complete":
+        return session
+    received = db.query(func.count(UploadChunk.index)).filter(UploadChunk.session_id == session.id).scalar()
+    if received != total_chunks(session):
+        raise UploadError(f"Upload has {received} of {total_chunks(session)} chunks")
+    if session.sha256 and _file_sha256(session.file_path) != session.sha256:
+        raise UploadError("Checksum mismatch for assembled file")
+
+    patient = db.query(Patient).filter(Patient.id == session.patient_id).first()
+    if session.kind == "scan":
+        # The session id keeps a re-uploaded filename from replacing an earlier scan's file
+        final_path = os.path.join(settings.UPLOAD_DIR, "scans", f"{session.patient_id}_{session.id}_{session.filename}")
+    else:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = os.path.splitext(session.filename)[1]
+        final_path = os.path.join(settings.UPLOAD_DIR, "genetic_data",
+                                  f"patient_{session.patient_id}_{timestamp}_{session.id[:8]}{extension}")
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    os.replace(session.file_path, final_path)
+
+    try:
+        if session.kind == "scan":
+            record = Scan(
+                about=session.about,
+                scan_type=session.scan_type,
+                file_path=final_path,
+                patient_id=session.patient_id,
+                hospital_id=patient.hospital_id if patient else None
+            )
+            db.add(record)
+        else:
+            analysis_result = analyze_genetic(pd.read_excel(final_path))
+            record = db.query(GeneticData).filter(GeneticData.patient_id == session.patient_id).first()
+            if record:
+                record.file_path = final_path
+                record.upload_date = datetime.utcnow()
+            else:
+                record = GeneticData(patient_id=session.patient_id, file_path=final_path)
+                db.add(record)
+            apply_analysis(record, analysis_result)
+        db.flush()
+        session.status = "complete"
+        session.record_id = record.id
+        session.file_path = final_path
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Put the file back so the client can retry completion
+        os.replace(final_path, session.file_path)
+        raise
+    db.refresh(session)
+    return session
+
+def abort_session(db: Session, session: UploadSession) -> None:
+    if session.status == "pending" and os.path.exists(session.file_path):
+        os.remove(session.file_path)
+    db.query(UploadChunk).filter(UploadChunk.session_id == session.id).delete(synchronize_session=False)
+    db.delete(session)
+    db.commit()
+
+def expire_sessions(db: Session, ttl_hours: Optional[float] = None) -> int:
+    """Drop pending uploads untouched for longer than the TTL. Returns sessions removed."""
+    ttl = settings.UPLOAD_SESSION_TTL_HOURS if ttl_hours is None else ttl_hours
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=ttl)
+    stale = db.query(UploadSession).filter(
+        UploadSession.status == "pending",
+        func.coalesce(UploadSession.updated_at, UploadSession.created_at) < cutoff
+    ).all()
+    for session in stale:
+        abort_session(db, session)
+    if stale:
+        logger.info(f"Expired {len(stale)} stale upload sessions")
+    return len(stale)
@@ -0,0 +1,283 @@
+"""Similar-lesion retrieval over stored skin image embeddings.
+
+Embeddings are L2-normalized float16 vectors appended to one contiguous
+matrix file (with a parallel file of image ids) that every worker memory-maps. Searches
+are exact (chunked matmul over the whole matrix) until an IVF layout has
+been trained with `manage.py rebuild-similarity-index --ivf`; after that only
+the `SIMILARITY_NPROBE` inverted lists nearest to the query are scanned.
+Rows appended after training are assigned to their nearest list as workers
+pick them up, so the index stays incremental.
+
+Appends, rebuilds and IVF training serialize on an flock'd `index.lock` in
+the index directory, and whole-file rewrites go through a temp file and
+`os.replace`, so a rebuild never drops a row another worker appended and
+readers never map a half-written file.
+"""
+import fcntl
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CHUNK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    # Replaced files get a new inode, so this changes even when the size does not
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _save_atomic(path: str, array: np.ndarray) -> None:
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(path + ".tmp", path)
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SEARCH_CHUNK_ROWS):
+        block = vectors[start:start + SEARCH_CHUNK_ROWS].astype(np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+class SimilarityIndex:
+    def __init__(self, directory: str, dim: int):
+        self.directory = directory
+        self.dim = dim
+        self.vectors_path = os.path.join(directory, "vectors.f16")
+        self.ids_path = os.path.join(directory, "ids.i64")
+        self.centroids_path = os.path.join(directory, "centroids.npy")
+        self.assignments_path = os.path.join(directory, "assignments.npy")
+        self.lock_path = os.path.join(directory, "index.lock")
+        self._vectors: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._count = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._covered = 0  # rows already placed in an inverted list
+        self._lock = threading.Lock()
+        self._ivf_signature = None
+        self._files = None  # inode of the mapped ids file
+
+    def __len__(self) -> int:
+        return self._count
+
+    @contextmanager
+    def _file_lock(self, mode: int = fcntl.LOCK_EX):
+        """Cross-process lock over the index files (shared for readers of the IVF pair)."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "ab") as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_ivf(self) -> None:
+        signature = _file_signature(self.centroids_path)
+        if signature is None:
+            self._centroids, self._lists, self._covered, self._ivf_signature = None, [], 0, None
+            return
+        if signature == self._ivf_signature:
+            return
+        # Centroids and assignments are replaced together under the lock; read them as a pair
+        with self._file_lock(fcntl.LOCK_SH):
+            signature = _file_signature(self.centroids_path)
+            if signature is None:
+                self._centroids, self._lists, self._covered, self._ivf_signature = None, [], 0, None
+                return
+            self._centroids = np.load(self.centroids_path)
+            assignments = np.load(self.assignments_path)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self._centroids))]
+        self._covered = len(assignments)
+        self._ivf_signature = signature
+
+    def _refresh(self) -> None:
+        """Pick up rows appended by this or any other worker since the last look."""
+        self._load_ivf()
+        # Ids are written after vectors, so a row counts once both halves exist
+        count = 0
+        if os.path.exists(self.ids_path) and os.path.exists(self.vectors_path):
+            count = min(os.path.getsize(self.ids_path) // 8, os.path.getsize(self.vectors_path) // (2 * self.dim))
+        # A rebuild elsewhere swaps the files for new inodes; remap even if the row count matches
+        files = (_file_signature(self.ids_path) or (None,))[0]
+        if self._files is not None and files != self._files and self._ivf_signature is not None:
+            # Row positions changed with the files; lists built for the old ones no longer apply
+            self._ivf_signature = None
+            self._load_ivf()
+        if count != self._count or files != self._files:
+            if count:
+                self._vectors = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(count, self.dim))
+                self._ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(count,))
+            else:
+                self._vectors = self._ids = None
+            self._count = count
+        self._files = files
+        if self._centroids is not None and self._covered < self._count:
+            new = np.arange(self._covered, self._count)
+            assignments = _nearest_centroids(self._vectors[self._covered:self._count], self._centroids)
+            for list_id in np.unique(assignments):
+                self._lists[list_id] = np.concatenate([self._lists[list_id], new[assignments == list_id]])
+            self._covered = self._count
+
+    def add(self, image_id: int, vector: np.ndarray) -> None:
+        self.add_many([(image_id, vector)])
+
+    def add_many(self, items: Iterable[Tuple[int, np.ndarray]]) -> None:
+        items = list(items)
+        if not items:
+            return
+        # Files are opened under the lock so an append never lands in a file a rebuild just replaced
+        with self._file_lock(), open(self.ids_path, "ab") as ids_file, open(self.vectors_path, "ab") as vectors_file:
+            vectors_file.write(_normalize(np.stack([vector for _, vector in items])).astype(np.float16).tobytes())
+            vectors_file.flush()
+            ids_file.write(np.array([image_id for image_id, _ in items], dtype=np.int64).tobytes())
+        with self._lock:
+            self._refresh()
+
+    def remove(self, image_ids: Iterable[int]) -> int:
+        """Drop every row of the given images, keeping any IVF layout. Returns rows removed."""
+        drop = np.array(sorted(set(image_ids)), dtype=np.int64)
+        if not len(drop):
+            return 0
+        with self._file_lock():
+            if not os.path.exists(self.ids_path) or not os.path.exists(self.vectors_path):
+                return 0
+            ids = np.fromfile(self.ids_path, dtype=np.int64)
+            vectors = np.fromfile(self.vectors_path, dtype=np.float16)
+            count = min(len(ids), len(vectors) // self.dim)
+            keep = ~np.isin(ids[:count], drop)
+            if keep.all():
+                return 0
+            vectors[:count * self.dim].reshape(count, self.dim)[keep].tofile(self.vectors_path + ".tmp")
+            ids[:count][keep].tofile(self.ids_path + ".tmp")
+            if os.path.exists(self.centroids_path):
+                assignments = np.load(self.assignments_path)
+                _save_atomic(self.assignments_path, assignments[keep[:len(assignments)]])
+                # Rewritten too, so readers see a new signature and reload the lists
+                _save_atomic(self.centroids_path, np.load(self.centroids_path))
+            os.replace(self.vectors_path + ".tmp", self.vectors_path)
+            os.replace(self.ids_path + ".tmp", self.ids_path)
+        with self._lock:
+            self._count = -1
+            self._refresh()
+        return int(count - keep.sum())
+
+    def vector(self, image_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            self._refresh()
+            ids, vectors = self._ids, self._vectors
+        if ids is None:
+            return None
+        matches = np.flatnonzero(ids == image_id)
+        return vectors[matches[-1]].astype(np.float32) if len(matches) else None
+
+    def search(self, query: np.ndarray, k: int, exclude_ids: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """Top-k (image_id, cosine similarity) pairs, best first."""
+        with self._lock:
+            self._refresh()
+            ids, vectors, lists, centroids = self._ids, self._vectors, self._lists, self._centroids
+        if ids is None:
+            return []
+        query = _normalize(query)
+        exclude = set(exclude_ids)
+
+        if centroids is not None:
+            probe = np.argsort(centroids @ query)[::-1][:settings.SIMILARITY_NPROBE]
+            positions = np.sort(np.concatenate([lists[i] for i in probe]))
+            scores = vectors[positions].astype(np.float32) @ query
+        else:
+            positions = np.arange(len(ids))
+            scores = np.empty(len(ids), dtype=np.float32)
+            for start in range(0, len(ids), SEARCH_CHUNK_ROWS):
+                block = vectors[start:start + SEARCH_CHUNK_ROWS].astype(np.float32)
+                scores[start:start + len(block)] = block @ query
+
+        ids = ids[positions]
+        # Over-fetch to leave room for excluded ids and re-added duplicates
+        want = min(len(scores), k + len(exclude) + 8)
+        top = np.argpartition(-scores, want - 1)[:want] if want < len(scores) else np.arange(len(scores))
+        results, seen = [], set()
+        for i in top[np.argsort(-scores[top])]:
+            image_id = int(ids[i])
+            if image_id in exclude or image_id in seen:
+                continue
+            seen.add(image_id)
+            results.append((image_id, round(float(scores[i]), 4)))
+            if len(results) == k:
+                break
+        return results
+
+    def rebuild(self, items: Iterable[Tuple[int, np.ndarray]]) -> int:
+        """Rewrite the index files from (image_id, vector) pairs and drop any IVF layout.
+
+        Appends from other workers wait for the rewrite and then land in the
+        new files; an image committed during the rebuild may appear twice,
+        which searches already tolerate.
+        """
+        count = 0
+        with self._file_lock():
+            with open(self.ids_path + ".tmp", "wb") as ids_file, open(self.vectors_path + ".tmp", "wb") as vectors_file:
+                for image_id, vector in items:
+                    vectors_file.write(_normalize(vector).astype(np.float16).tobytes())
+                    ids_file.write(np.int64(image_id).tobytes())
+                    count += 1
+            for path in (self.centroids_path, self.assignments_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            os.replace(self.vectors_path + ".tmp", self.vectors_path)
+            os.replace(self.ids_path + ".tmp", self.ids_path)
+        with self._lock:
+            self._count = -1
+            self._refresh()
+        return count
+
+    def train_ivf(self, nlist: Optional[int] = None, iterations: int = 10, sample_size: int = 50000) -> int:
+        """Cluster the stored vectors (spherical k-means) and persist the inverted lists."""
+        with self._lock:
+            self._refresh()
+            vectors = self._vectors
+        if vectors is None:
+            return 0
+        nlist = nlist or max(1, min(4096, int(np.sqrt(len(vectors)))))
+        rng = np.random.default_rng(0)
+        sample = vectors[np.sort(rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False))]
+        sample = sample.astype(np.float32)
+        centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(len(centroids)):
+                members = sample[labels == i]
+                if len(members):
+                    centroids[i] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        assignments = _nearest_centroids(vectors, centroids)
+        with self._file_lock():
+            _save_atomic(self.assignments_path, assignments)
+            _save_atomic(self.centroids_path, centroids)
+        logger.info(f"Trained IVF with {len(centroids)} lists over {len(vectors)} embeddings")
+        return len(centroids)
+
+
+index = SimilarityIndex(settings.SIMILARITY_INDEX_DIR, settings.EMBEDDING_DIM)
@@ -0,0 +1,57 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from .config import settings
+
+# Per-process limits: with N server workers a hospital can hold up to N times
+# these values, which still bounds its share of the database connection pool.
+_request_slots: Dict[int, asyncio.Semaphore] = defaultdict(
+    lambda: asyncio.Semaphore(settings.TENANT_MAX_CONCURRENT_REQUESTS)
+)
+_import_slots: Dict[int, asyncio.Semaphore] = defaultdict(
+    lambda: asyncio.Semaphore(settings.TENANT_MAX_CONCURRENT_IMPORTS)
+)
+
+
+def _hospital_id(request: Request) -> Optional[int]:
+    value = request.path_params.get("hospital_id") or request.query_params.get("hospital_id")
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+async def _hold(slots: Dict[int, asyncio.Semaphore], request: Request, kind: str):
+    hospital_id = _hospital_id(request)
+    if hospital_id is None:
+        # No tenant to charge; keying on None would make one slot shared by every caller
+        yield
+        return
+    semaphore = slots[hospital_id]
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=settings.TENANT_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many concurrent {kind} for hospital {hospital_id}",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+async def tenant_request_slot(request: Request):
+    """Dependency bounding concurrent hospital-scoped requests per hospital."""
+    async for _ in _hold(_request_slots, request, "requests"):
+        yield
+
+
+async def tenant_import_slot(request: Request):
+    """Dependency bounding concurrent bulk imports per hospital."""
+    async for _ in _hold(_import_slots, request, "imports"):
+        yield
@@ -0,0 +1 @@
+# Load and micro benchmarks for the Badal API. Run from backend/: python -m benchmarks --help
@@ -0,0 +1,105 @@
+"""Benchmark entry point.
+
+Examples (run from backend/):
+
+    python -m benchmarks load --scale small --target asgi --out bench.json
+    python -m benchmarks load --target http --base-url http://localhost:8000 --baseline bench.json
+    python -m benchmarks load --target flask
+    python -m benchmarks micro --out micro.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+DEFAULT_WORKLOADS = ["list", "detail", "create", "upload_patients", "predict_skin", "predict_genetic"]
+
+
+def _load(args):
+    # The app reads DATABASE_URL at import time, so it must be set before any app import
+    os.environ["DATABASE_URL"] = args.database_url
+    from app.database import SessionLocal, engine
+    from app.models.models import Base
+    from .load import Context, WORKLOADS, run_fastapi, run_flask
+    from .seed import SCALES, seed_database
+
+    ids = {"hospital_ids": [1], "patient_ids": list(range(1, 51))}
+    if args.target != "flask" and not args.no_seed:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        try:
+            ids = seed_database(db, SCALES[args.scale], args.upload_dir)
+        finally:
+            db.close()
+
+    ctx = Context(patient_ids=ids["patient_ids"], hospital_ids=ids["hospital_ids"])
+    if args.target == "flask":
+        results = run_flask(ctx, args.concurrency, args.duration, args.warmup, base_url=args.base_url)
+    else:
+        unknown = set(args.workloads) - set(WORKLOADS)
+        if unknown:
+            sys.exit(f"Unknown workloads: {', '.join(sorted(unknown))}")
+        results = asyncio.run(run_fastapi(args.target, ctx, args.workloads, args.concurrency,
+                                          args.duration, args.warmup, base_url=args.base_url))
+    return {
+        "target": args.target,
+        "scale": args.scale,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "database": args.database_url.split("@")[-1],
+    }, results
+
+
+def _micro(args):
+    from .micro import MICROBENCHMARKS, run_micro
+
+    names = args.benchmarks or list(MICROBENCHMARKS)
+    return {"number": args.number, "repeat": args.repeat}, run_micro(names, args.number, args.repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Badal API benchmarks")
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression (default 10%%)")
+    subparsers = parser.add_subparsers(dest="kind", required=True)
+
+    load = subparsers.add_parser("load", help="Concurrent HTTP/ASGI workloads")
+    load.add_argument("--target", choices=["asgi", "http", "flask"], default="asgi")
+    load.add_argument("--base-url", help="Server URL for --target http (or flask over HTTP)")
+    load.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL", "sqlite:///./bench.db"))
+    load.add_argument("--scale", default="tiny", choices=["tiny", "small", "medium", "large"])
+    load.add_argument("--upload-dir", default="bench_uploads")
+    load.add_argument("--no-seed", action="store_true", help="Reuse an already seeded database")
+    load.add_argument("--workloads", nargs="+", default=DEFAULT_WORKLOADS)
+    load.add_argument("--concurrency", type=int, default=8)
+    load.add_argument("--duration", type=float, default=10.0, help="Seconds per workload")
+    load.add_argument("--warmup", type=int, default=5)
+    load.set_defaults(func=_load)
+
+    micro = subparsers.add_parser("micro", help="Function-level microbenchmarks")
+    micro.add_argument("benchmarks", nargs="*")
+    micro.add_argument("--number", type=int, default=20)
+    micro.add_argument("--repeat", type=int, default=30)
+    micro.set_defaults(func=_micro)
+
+    args = parser.parse_args()
+    if args.kind == "load" and args.target == "http" and not args.base_url:
+        parser.error("--target http requires --base-url")
+
+    from .stats import build_report, compare, write_report
+
+    config, results = args.func(args)
+    report = build_report(args.kind, config, results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+    write_report(report, args.out)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
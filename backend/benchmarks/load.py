@@ -0,0 +1,233 @@
+import asyncio
+import importlib.util
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .seed import make_jpeg, make_genetic_excel, make_patient_excel, make_image_zip
+from .stats import summarize
+
+
+FLASK_APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "app.py"))
+
+
+def load_flask_module():
+    """Import the repository-root Flask `app.py` without clashing with the `app` package."""
+    spec = importlib.util.spec_from_file_location("badal_flask_app", FLASK_APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    json: Optional[dict] = None
+    files: Optional[dict] = None
+    params: Optional[dict] = None
+
+
+@dataclass
+class Context:
+    patient_ids: List[int]
+    hospital_ids: List[int]
+    rnd: random.Random = field(default_factory=lambda: random.Random(7))
+    skin_image: bytes = field(default_factory=make_jpeg)
+    genetic_file: bytes = field(default_factory=make_genetic_excel)
+    patient_file: bytes = field(default_factory=lambda: make_patient_excel(rows=50))
+    skin_archive: bytes = field(default_factory=lambda: make_image_zip(count=100))
+
+
+def _list(ctx: Context) -> Request:
+    return Request("GET", "/api/patients/", params={"skip": ctx.rnd.randint(0, 1000), "limit": 100})
+
+
+def _list_full_page(ctx: Context) -> Request:
+    return Request("GET", "/api/patients/", params={"skip": ctx.rnd.randint(0, 1000), "limit": 1000})
+
+
+def _list_projected(ctx: Context) -> Request:
+    return Request("GET", "/api/patients/", params={
+        "skip": ctx.rnd.randint(0, 1000), "limit": 1000, "fields": "name,age,status,condition,hospital_id"
+    })
+
+
+def _list_high_risk(ctx: Context) -> Request:
+    return Request("GET", "/api/patients/", params={"genetic_risk": "High", "min_score": 80, "limit": 100})
+
+
+def _detail(ctx: Context) -> Request:
+    return Request("GET", f"/api/patients/{ctx.rnd.choice(ctx.patient_ids)}")
+
+
+def _create(ctx: Context) -> Request:
+    return Request("POST", "/api/patients/", json={
+        "name": "Bench Patient",
+        "age": ctx.rnd.randint(1, 95),
+        "gender": "female",
+        "hospital_id": ctx.rnd.choice(ctx.hospital_ids),
+        "condition": "stable",
+    })
+
+
+def _upload(ctx: Context) -> Request:
+    return Request("POST", "/api/patients/upload", files={
+        "file": ("patients.xlsx", ctx.patient_file, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    })
+
+
+def _import(ctx: Context) -> Request:
+    # Same sheet every time, so after the first call this measures the no-change diff
+    return Request("POST", "/api/patients/import", params={"hospital_id": ctx.hospital_ids[0]}, files={
+        "file": ("patients.xlsx", ctx.patient_file, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    })
+
+
+def _skin(ctx: Context) -> Request:
+    return Request("POST", "/api/ml/predict/skin", files={"file": ("lesion.jpg", ctx.skin_image, "image/jpeg")})
+
+
+def _skin_batch(ctx: Context) -> Request:
+    return Request("POST", "/api/ml/predict/skin/batch", files={"files": ("session.zip", ctx.skin_archive, "application/zip")})
+
+
+def _genetic(ctx: Context) -> Request:
+    return Request("POST", "/api/ml/predict/genetic", files={
+        "file": ("genetic.xlsx", ctx.genetic_file, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    })
+
+
+def _hospital_patients(ctx: Context) -> Request:
+    return Request("GET", f"/api/hospitals/{ctx.rnd.choice(ctx.hospital_ids)}/patients",
+                   params={"skip": ctx.rnd.randint(0, 500), "limit": 100})
+
+
+def _summary(ctx: Context) -> Request:
+    return Request("GET", f"/api/hospitals/{ctx.rnd.choice(ctx.hospital_ids)}/summary")
+
+
+WORKLOADS: Dict[str, Callable[[Context], Request]] = {
+    "list": _list,
+    "list_1000": _list_full_page,
+    "list_1000_projected": _list_projected,
+    "list_high_risk": _list_high_risk,
+    "detail": _detail,
+    "create": _create,
+    "upload_patients": _upload,
+    "import_patients": _import,
+    "predict_skin": _skin,
+    "predict_skin_batch": _skin_batch,
+    "predict_genetic": _genetic,
+    "hospital_summary": _summary,
+    "hospital_patients": _hospital_patients,
+}
+
+
+def _flask_workloads(ctx: Context) -> Dict[str, Callable[[], Request]]:
+    return {
+        "flask_list": lambda: Request("GET", "/patients"),
+        "flask_detail": lambda: Request("GET", f"/patients/{ctx.rnd.randint(1, 50)}"),
+        "flask_create": lambda: Request("POST", "/patients", json={
+            "name": "Bench Patient",
+            "age": ctx.rnd.randint(1, 95),
+            "vitals": {"blood_pressure": "130/85", "temperature": 99.1, "heart_rate": 80},
+        }),
+    }
+
+
+async def _drive(client, make_request: Callable[[], Request], concurrency: int, duration: float, warmup: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+
+    async def call():
+        request = make_request()
+        start = time.perf_counter()
+        response = await client.request(request.method, request.path, json=request.json,
+                                        files=request.files, params=request.params)
+        return time.perf_counter() - start, response.status_code
+
+    for _ in range(warmup):
+        await call()
+
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            elapsed, status = await call()
+            latencies.append(elapsed)
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_fastapi(target: str, ctx: Context, workloads: List[str], concurrency: int,
+                      duration: float, warmup: int, base_url: Optional[str] = None) -> Dict[str, Dict]:
+    """Run workloads against the FastAPI app in-process (ASGI) or over HTTP."""
+    import httpx
+
+    if target == "asgi":
+        from run import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    else:
+        client = httpx.AsyncClient(base_url=base_url, timeout=60)
+
+    results = {}
+    async with client:
+        for name in workloads:
+            make = WORKLOADS[name]
+            results[name] = await _drive(client, lambda: make(ctx), concurrency, duration, warmup)
+    return results
+
+
+def run_flask(ctx: Context, concurrency: int, duration: float, warmup: int,
+              base_url: Optional[str] = None) -> Dict[str, Dict]:
+    """Run the legacy Flask `app.py` workloads through its test client or over HTTP."""
+    if base_url:
+        import httpx
+        client_factory = lambda: httpx.Client(base_url=base_url, timeout=60)
+    else:
+        flask_app = load_flask_module()
+        flask_app.patients.extend({"id": i, "name": f"Patient {i}", "age": 40, "vitals": {}} for i in range(1, 51))
+        client_factory = flask_app.app.test_client
+
+    results = {}
+    for name, make in _flask_workloads(ctx).items():
+        latencies: List[float] = []
+        errors = 0
+
+        def worker():
+            nonlocal errors
+            client = client_factory()
+            local = []
+            while time.perf_counter() < deadline:
+                request = make()
+                start = time.perf_counter()
+                if request.method == "GET":
+                    response = client.get(request.path)
+                else:
+                    response = client.post(request.path, json=request.json)
+                local.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+            latencies.extend(local)
+
+        client = client_factory()
+        for _ in range(warmup):
+            request = make()
+            client.get(request.path) if request.method == "GET" else client.post(request.path, json=request.json)
+
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        results[name] = summarize(latencies, errors, time.perf_counter() - start)
+    return results
@@ -0,0 +1,54 @@
+import io
+import timeit
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from .load import load_flask_module
+from .seed import make_jpeg, make_genetic_excel
+from .stats import summarize
+
+
+def _time(func: Callable[[], object], number: int, repeat: int) -> Dict:
+    # Each sample is the mean of `number` calls; percentiles are across samples
+    samples = [t / number for t in timeit.repeat(func, number=number, repeat=repeat)]
+    return summarize(samples, 0, sum(samples))
+
+
+def bench_preprocess_image(number: int, repeat: int) -> Dict:
+    from app.routes.ml import preprocess_image
+
+    contents = make_jpeg(size=1024)
+    return _time(lambda: preprocess_image(contents), number, repeat)
+
+
+def bench_analyze_genetic_data(number: int, repeat: int) -> Dict:
+    from app.routes.ml import analyze_genetic_data
+
+    df = pd.read_excel(io.BytesIO(make_genetic_excel(rows=1000)))
+    return _time(lambda: analyze_genetic_data(df), number, repeat)
+
+
+def bench_predict_condition(number: int, repeat: int) -> Dict:
+    # The Flask app lives at the repository root and pulls in sklearn/tensorflow
+    predict_condition = load_flask_module().predict_condition
+
+    patient = {"age": 54, "vitals": {"blood_pressure": "140/90", "temperature": 100.2, "heart_rate": 88}}
+    return _time(lambda: predict_condition(patient), number, repeat)
+
+
+MICROBENCHMARKS = {
+    "preprocess_image": bench_preprocess_image,
+    "analyze_genetic_data": bench_analyze_genetic_data,
+    "predict_condition": bench_predict_condition,
+}
+
+
+def run_micro(names: List[str], number: int, repeat: int) -> Dict[str, Dict]:
+    results = {}
+    for name in names:
+        try:
+            results[name] = MICROBENCHMARKS[name](number, repeat)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+    return results
@@ -0,0 +1,153 @@
+import io
+import os
+import random
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from sqlalchemy.orm import Session
+
+from app.models.models import Hospital, Patient, VitalSigns, Scan, GeneticData
+from app.services.summary_service import rebuild_hospital_summaries
+
+CONDITIONS = ["stable", "critical", "recovered"]
+GENETIC_MARKERS = ["BRCA1", "BRCA2", "TP53", "EGFR", "KRAS", "PTEN", "APC", "MLH1"]
+
+
+@dataclass
+class Scale:
+    hospitals: int
+    patients_per_hospital: int
+    scans_per_patient: int
+    genetic_fraction: float
+
+
+SCALES: Dict[str, Scale] = {
+    "tiny": Scale(hospitals=2, patients_per_hospital=50, scans_per_patient=1, genetic_fraction=0.2),
+    "small": Scale(hospitals=5, patients_per_hospital=1000, scans_per_patient=1, genetic_fraction=0.2),
+    "medium": Scale(hospitals=20, patients_per_hospital=5000, scans_per_patient=2, genetic_fraction=0.2),
+    "large": Scale(hospitals=50, patients_per_hospital=20000, scans_per_patient=2, genetic_fraction=0.1),
+}
+
+
+def make_jpeg(size: int = 600, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 255, size=(size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def make_image_zip(count: int = 100, size: int = 600) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for i in range(count):
+            archive.writestr(f"lesion_{i:04d}.jpg", make_jpeg(size=size, seed=i))
+    return buffer.getvalue()
+
+
+def make_genetic_excel(rows: int = 100, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    markers = list(rng.choice(GENETIC_MARKERS, size=4, replace=False))
+    df = pd.DataFrame(rng.random((rows, len(markers))), columns=markers)
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def make_patient_excel(rows: int, hospital_id: int = 1, seed: int = 0) -> bytes:
+    rnd = random.Random(seed)
+    df = pd.DataFrame([{
+        "mrn": f"MRN{hospital_id:03d}{i:07d}",
+        "name": f"Upload Patient {i}",
+        "age": rnd.randint(1, 95),
+        "gender": rnd.choice(["male", "female"]),
+        "hospital_id": hospital_id,
+        "status": "active",
+        "condition": rnd.choice(CONDITIONS),
+        "diagnosis": "synthetic",
+    } for i in range(rows)])
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def seed_database(db: Session, scale: Scale, upload_dir: str, seed: int = 42) -> Dict[str, List[int]]:
+    """Insert synthetic hospitals, patients, vitals, scans and genetic files.
+
+    Returns the generated ids so workloads can address existing rows.
+    """
+    rnd = random.Random(seed)
+    scan_dir = os.path.join(upload_dir, "scans")
+    genetic_dir = os.path.join(upload_dir, "genetic_data")
+    os.makedirs(scan_dir, exist_ok=True)
+    os.makedirs(genetic_dir, exist_ok=True)
+    scan_bytes = make_jpeg(size=256, seed=seed)
+    genetic_bytes = make_genetic_excel(seed=seed)
+
+    hospitals = [Hospital(name=f"Hospital {i}", password="bench") for i in range(scale.hospitals)]
+    db.add_all(hospitals)
+    db.flush()
+
+    patient_ids: List[int] = []
+    for hospital in hospitals:
+        rows = [{
+            "name": f"Patient {hospital.id}-{i}",
+            "age": rnd.randint(1, 95),
+            "gender": rnd.choice(["male", "female"]),
+            "status": "active",
+            "condition": rnd.choice(CONDITIONS),
+            "diagnosis": "synthetic",
+            "treatment": "",
+            "medical_history": "",
+            "hospital_id": hospital.id,
+            "is_active": True,
+        } for i in range(scale.patients_per_hospital)]
+        db.execute(Patient.__table__.insert(), rows)
+        ids = [row[0] for row in db.query(Patient.id).filter(Patient.hospital_id == hospital.id)]
+        patient_ids.extend(ids)
+
+        db.execute(VitalSigns.__table__.insert(), [{
+            "patient_id": pid,
+            "hospital_id": hospital.id,
+            "blood_pressure": f"{rnd.randint(100, 160)}/{rnd.randint(60, 100)}",
+            "heart_rate": rnd.randint(50, 120),
+            "temperature": round(rnd.uniform(97.0, 103.0), 1),
+            "oxygen_level": round(rnd.uniform(88.0, 100.0), 1),
+        } for pid in ids])
+
+        scans = []
+        for pid in ids:
+            for n in range(scale.scans_per_patient):
+                path = os.path.join(scan_dir, f"{pid}_{n}.jpg")
+                with open(path, "wb") as f:
+                    f.write(scan_bytes)
+                scans.append({"patient_id": pid, "hospital_id": hospital.id, "about": "synthetic", "scan_type": "xray", "file_path": path})
+        if scans:
+            db.execute(Scan.__table__.insert(), scans)
+
+        genetic = []
+        for pid in ids:
+            if rnd.random() < scale.genetic_fraction:
+                path = os.path.join(genetic_dir, f"patient_{pid}.xlsx")
+                with open(path, "wb") as f:
+                    f.write(genetic_bytes)
+                score = round(rnd.uniform(0, 100), 2)
+                level = "High" if score >= 70 else "Medium" if score >= 40 else "Low"
+                genetic.append({
+                    "patient_id": pid,
+                    "file_path": path,
+                    "analysis_result": {"risk_level": level, "risk_score": score},
+                    "risk_level": level,
+                    "risk_score": score,
+                })
+        if genetic:
+            db.execute(GeneticData.__table__.insert(), genetic)
+
+    db.commit()
+    # Rows were bulk inserted, so bring the dashboard counters in line
+    rebuild_hospital_summaries(db)
+    return {"hospital_ids": [h.id for h in hospitals], "patient_ids": patient_ids}
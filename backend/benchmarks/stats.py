@@ -0,0 +1,70 @@
+import json
+import platform
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Throughput and latency percentiles (milliseconds) for one workload."""
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    count = len(values)
+    summary = {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+    }
+    if count:
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary.update({
+            "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()), 3),
+        })
+    return summary
+
+
+def build_report(kind: str, config: Dict, results: Dict[str, Dict]) -> Dict:
+    return {
+        "kind": kind,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """Return regressions where p95 latency grew or throughput dropped beyond tolerance."""
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for metric, worse_if_higher in (("p95_ms", True), ("mean_ms", True), ("throughput_rps", False)):
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (worse_if_higher and change > tolerance) or (not worse_if_higher and -change > tolerance):
+                regressions.append({
+                    "workload": name,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change_pct": round(change * 100, 1),
+                })
+    return regressions
+
+
+def write_report(report: Dict, path: Optional[str]) -> None:
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+    else:
+        print(text)
@@ -0,0 +1,84 @@
+"""Production server: gunicorn master with uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py run:app
+
+The app and model weights are loaded once in the master and workers are
+forked from it, so read-only pages (code, memory-mapped weights) are shared
+copy-on-write. `kill -HUP <master>` replaces workers gracefully while the
+master keeps the listening socket open; `kill -USR2` re-executes the master
+for a zero-downtime binary/code upgrade.
+
+Set METRICS_DIR to a directory shared by the workers so that whichever
+worker answers a /metrics scrape reports every worker's histograms.
+"""
+import gc
+import logging
+import os
+import time
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+timeout = int(os.environ.get("WORKER_TIMEOUT", 120))
+keepalive = 5
+max_requests = int(os.environ.get("MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", 0))
+
+logger = logging.getLogger("gunicorn.error")
+
+
+def on_starting(server):
+    # Runs once in the master after the app is preloaded and before any fork
+    from app import metrics, model_store
+    from app.init_db import create_tables
+
+    if os.environ.get("SKIP_SCHEMA_SETUP") != "1":
+        create_tables()
+    metrics.reset_worker_metrics()
+
+    start = time.perf_counter()
+    mapped = model_store.preload()
+    logger.info("Preloaded models in %.2fs (%.1f MB mapped)", time.perf_counter() - start, mapped / 1e6)
+
+    # Move everything allocated so far out of the collector's reach so that
+    # gc passes in workers do not touch (and un-share) the master's pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.database import engine, replicas
+
+    # Connections opened in the master must not be reused across processes
+    engine.dispose(close=False)
+    for replica in replicas:
+        replica.engine.dispose(close=False)
+    worker.boot_started = time.perf_counter()
+
+
+def post_worker_init(worker):
+    from app import metrics
+
+    startup = time.perf_counter() - worker.boot_started
+    metrics.worker_info["startup_seconds"] = round(startup, 4)
+    memory = metrics.read_memory()
+    logger.info(
+        "Worker %s ready in %.3fs: rss=%.1f MB pss=%s MB",
+        worker.pid,
+        startup,
+        memory.get("rss", 0) / 1e6,
+        f"{memory['pss'] / 1e6:.1f}" if "pss" in memory else "n/a",
+    )
+
+
+def worker_exit(server, worker):
+    logger.info("Worker %s exiting", worker.pid)
+
+
+def child_exit(server, worker):
+    from app import metrics
+
+    # Runs in the master; a replaced worker's series should not be scraped forever
+    metrics.remove_worker_metrics(worker.pid)
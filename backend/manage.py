@@ -0,0 +1,193 @@
+import argparse
+import logging
+import time
+
+from app.database import SessionLocal
+
+
+def init_db(args):
+    from app.init_db import create_tables
+
+    create_tables()
+
+
+def reconcile_summaries(args):
+    from app.services.summary_service import rebuild_hospital_summaries
+
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_hospital_summaries(db)
+        print(f"Rebuilt summaries for {rebuilt} hospitals")
+    finally:
+        db.close()
+
+
+def purge_deleted(args):
+    from app.services.purge_service import purge_deleted_patients
+
+    while True:
+        db = SessionLocal()
+        try:
+            totals = purge_deleted_patients(db, batch_size=args.batch_size, grace_hours=args.grace_hours)
+            print(f"Purged {totals['patients']} patients, {totals['rows']} dependent rows, {totals['files']} files")
+        finally:
+            db.close()
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+def backfill_tenant_keys(args):
+    from sqlalchemy import select
+    from app.init_db import add_missing_columns
+    from app.models.models import Patient, Scan, VitalSigns
+
+    for model in (Scan, VitalSigns):
+        for statement in add_missing_columns(model):
+            print(f"{statement};")
+
+    db = SessionLocal()
+    try:
+        for model in (Scan, VitalSigns):
+            owner = select(Patient.hospital_id).where(Patient.id == model.patient_id).scalar_subquery()
+            updated = db.query(model).filter(model.hospital_id.is_(None)).update(
+                {model.hospital_id: owner}, synchronize_session=False
+            )
+            db.commit()
+            print(f"Set hospital_id on {updated} {model.__tablename__} rows")
+    finally:
+        db.close()
+
+
+def backfill_genetic_risk(args):
+    from app.init_db import add_missing_columns
+    from app.models.models import GeneticData
+    from app.services.genetic_service import backfill_risk_columns
+
+    for statement in add_missing_columns(GeneticData):
+        print(f"{statement};")
+
+    db = SessionLocal()
+    try:
+        updated = backfill_risk_columns(db, batch_size=args.batch_size)
+        print(f"Backfilled risk columns on {updated} genetic_data rows")
+    finally:
+        db.close()
+
+
+def rebuild_similarity_index(args):
+    from app.services.skin_service import rebuild_index
+
+    db = SessionLocal()
+    try:
+        totals = rebuild_index(db, ivf=args.ivf)
+        lists = f" in {totals['lists']} IVF lists" if totals["lists"] else ""
+        print(f"Indexed {totals['images']} skin image embeddings{lists}")
+    finally:
+        db.close()
+
+
+def expire_uploads(args):
+    from app.services.upload_service import expire_sessions
+
+    db = SessionLocal()
+    try:
+        expired = expire_sessions(db, ttl_hours=args.ttl_hours)
+        print(f"Removed {expired} stale upload sessions")
+    finally:
+        db.close()
+
+
+def archive(args):
+    from app.services.archive_service import archive_patients
+
+    db = SessionLocal()
+    try:
+        totals = archive_patients(db, batch_size=args.batch_size, after_days=args.after_days,
+                                  max_batches=args.max_batches)
+        print(f"Archived {totals['patients']} patients ({totals['rows']} rows) in {totals['batches']} batches")
+    finally:
+        db.close()
+
+
+def restore_archived(args):
+    from app.services.archive_service import restore_patients
+
+    db = SessionLocal()
+    try:
+        restored = restore_patients(db, args.patient_ids)
+        print(f"Restored {restored} patients from the archive")
+    finally:
+        db.close()
+
+
+def partition_tables(args):
+    from sqlalchemy import text
+    from app.database import engine
+    from app.partitioning import partition_ddl
+
+    statements = partition_ddl(args.partitions)
+    if not args.apply:
+        print(";\n\n".join(statements) + ";")
+        return
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Partitioning is only supported on PostgreSQL")
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    print(f"Created schema with {args.partitions} hospital partitions per clinical table")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Badal maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init = subparsers.add_parser("init-db", help="Create database tables (one-time schema setup)")
+    init.set_defaults(func=init_db)
+
+    reconcile = subparsers.add_parser("reconcile-summaries", help="Rebuild hospital dashboard counters from patients")
+    reconcile.set_defaults(func=reconcile_summaries)
+
+    purge = subparsers.add_parser("purge-deleted", help="Hard-delete soft-deleted patients, their rows and upload files")
+    purge.add_argument("--batch-size", type=int, default=None)
+    purge.add_argument("--grace-hours", type=float, default=None, help="Only purge patients deleted at least this long ago")
+    purge.add_argument("--interval", type=float, default=0, help="Keep running, sleeping this many seconds between passes")
+    purge.set_defaults(func=purge_deleted)
+
+    tenant_keys = subparsers.add_parser("backfill-tenant-keys", help="Add hospital_id to scans and vitals if missing, then copy it from patients")
+    tenant_keys.set_defaults(func=backfill_tenant_keys)
+
+    genetic_risk = subparsers.add_parser("backfill-genetic-risk", help="Add genetic_data risk columns if missing, then copy risk level/score out of stored analyses")
+    genetic_risk.add_argument("--batch-size", type=int, default=1000)
+    genetic_risk.set_defaults(func=backfill_genetic_risk)
+
+    similarity = subparsers.add_parser("rebuild-similarity-index", help="Rewrite the similar-lesion index from stored embeddings")
+    similarity.add_argument("--ivf", action="store_true", help="Also train IVF lists for approximate search at scale")
+    similarity.set_defaults(func=rebuild_similarity_index)
+
+    uploads = subparsers.add_parser("expire-uploads", help="Remove resumable uploads abandoned before completion")
+    uploads.add_argument("--ttl-hours", type=float, default=None)
+    uploads.set_defaults(func=expire_uploads)
+
+    archive_cmd = subparsers.add_parser("archive", help="Move inactive and long-untouched patients to Parquet cold storage")
+    archive_cmd.add_argument("--batch-size", type=int, default=None)
+    archive_cmd.add_argument("--after-days", type=int, default=None, help="Archive live patients untouched this many days")
+    archive_cmd.add_argument("--max-batches", type=int, default=None)
+    archive_cmd.set_defaults(func=archive)
+
+    restore = subparsers.add_parser("restore-archived", help="Move archived patients back into the hot tables")
+    restore.add_argument("patient_ids", type=int, nargs="+")
+    restore.set_defaults(func=restore_archived)
+
+    partition = subparsers.add_parser("partition-tables", help="Create a hash-partitioned (by hospital) PostgreSQL schema")
+    partition.add_argument("--partitions", type=int, default=8)
+    partition.add_argument("--apply", action="store_true", help="Execute against DATABASE_URL instead of printing the DDL")
+    partition.set_defaults(func=partition_tables)
+
+    logging.basicConfig(level=logging.INFO)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
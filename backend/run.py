@@ -2,12 +2,10 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import router
-from app.models.models import Base
-from app.database import engine
+from app.database import engine, replicas, ReadYourWritesMiddleware
+from app.init_db import create_tables
 from app.config import settings
-
-# Create tables in the database
-Base.metadata.create_all(bind=engine)
+from app import metrics
 
 app = FastAPI(title="Badal Healthcare API")
 
@@ -23,5 +21,20 @@ app.add_middleware(
 
 app.include_router(router, prefix=settings.API_V1_STR)
 
+# Reads that follow a write from the same client stay on the primary
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Per-route latency, SQL counts and slow-query samples exposed at /metrics
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(engine)
+    for replica in replicas:
+        metrics.instrument_engine(replica.engine)
+    app.add_middleware(metrics.MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+    app.include_router(metrics.router)
+
 if __name__ == "__main__":
+    # Development server; production uses gunicorn.conf.py (schema setup happens
+    # once in the master there, never in request workers)
+    create_tables()
     uvicorn.run("run:app", host="0.0.0.0", port=8000, reload=True)
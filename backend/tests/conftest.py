@@ -0,0 +1,60 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Settings are read at import time, so point everything at a scratch directory first
+WORK_DIR = tempfile.mkdtemp(prefix="badal-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(WORK_DIR, 'test.db')}")
+for name, sub in (("UPLOAD_DIR", "uploads"), ("SKIN_IMAGE_DIR", "uploads/skin_images"),
+                  ("SIMILARITY_INDEX_DIR", "uploads/similarity_index"), ("ARCHIVE_DIR", "archive"),
+                  ("MODEL_DIR", "models")):
+    os.environ.setdefault(name, os.path.join(WORK_DIR, sub))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models.models import Base  # noqa: E402
+from app.similarity import index  # noqa: E402
+
+
+@pytest.fixture
+def db_session():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    for directory in (settings.UPLOAD_DIR, settings.ARCHIVE_DIR):
+        shutil.rmtree(directory, ignore_errors=True)
+    index.rebuild([])
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client(db_session):
+    from run import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def hospital(client):
+    return client.post("/api/hospitals/", json={"name": "General", "password": "secret"}).json()
+
+
+@pytest.fixture
+def make_patient(client, hospital):
+    def make(**fields):
+        payload = {"name": "Patient", "age": 40, "gender": "f", "hospital_id": hospital["id"], **fields}
+        response = client.post("/api/patients/", json=payload)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from app.models.models import ArchivedPatient, Patient, Scan, SkinCancerImage
+from app.services.archive_service import archive_batch, archive_candidates
+from app.services.summary_service import rebuild_hospital_summaries
+from app.similarity import index
+from test_ml import png
+
+
+def store_image(client, patient, seed=0):
+    response = client.post("/api/ml/predict/skin", data={"patient_id": str(patient["id"])},
+                           files={"file": ("lesion.png", png(seed), "image/png")})
+    assert response.status_code == 200, response.text
+    return response.json()["image_id"]
+
+
+def test_archive_and_restore_round_trip(client, db_session, hospital, make_patient):
+    patient = make_patient(condition="critical")
+    image_id = store_image(client, patient)
+    assert index.vector(image_id) is not None
+
+    assert archive_batch(db_session, [patient["id"]])["patients"] == 1
+    assert db_session.get(ArchivedPatient, patient["id"]) is not None
+    assert db_session.query(Patient).filter(Patient.id == patient["id"]).count() == 0
+    assert index.vector(image_id) is None
+    # Archived live patients stay on the dashboard, including after a reconciliation
+    assert client.get(f"/api/hospitals/{hospital['id']}/summary").json()["critical_patients"] == 1
+    rebuild_hospital_summaries(db_session)
+    assert client.get(f"/api/hospitals/{hospital['id']}/summary").json()["critical_patients"] == 1
+    # Reads are served from the archive without restoring
+    archived = client.get(f"/api/patients/{patient['id']}")
+    assert archived.status_code == 200 and archived.json()["condition"] == "critical"
+    assert db_session.get(ArchivedPatient, patient["id"]) is not None
+
+    restored = client.post(f"/api/patients/{patient['id']}/restore")
+    assert restored.status_code == 200 and restored.json()["id"] == patient["id"]
+    db_session.expire_all()
+    assert db_session.get(ArchivedPatient, patient["id"]) is None
+    assert db_session.query(SkinCancerImage).filter(SkinCancerImage.id == image_id).count() == 1
+    assert index.vector(image_id) is not None
+    assert client.get(f"/api/hospitals/{hospital['id']}/summary").json()["critical_patients"] == 1
+    assert client.post(f"/api/patients/{patient['id']}/restore").status_code == 404
+
+
+def test_writes_restore_archived_patients(client, db_session, make_patient):
+    patient = make_patient()
+    archive_batch(db_session, [patient["id"]])
+    # The async prediction route restores in the threadpool before storing the image
+    image_id = store_image(client, patient, seed=1)
+    assert image_id is not None
+    db_session.expire_all()
+    assert db_session.get(ArchivedPatient, patient["id"]) is None
+    assert client.put(f"/api/patients/{patient['id']}", json={"condition": "stable"}).status_code == 200
+
+
+def test_recent_child_records_keep_patients_hot(client, db_session, make_patient):
+    old = datetime.now(timezone.utc) - timedelta(days=1000)
+    idle, scanned, vitals, imaged = (make_patient()["id"] for _ in range(4))
+    db_session.query(Patient).update({Patient.created_at: old, Patient.updated_at: None}, synchronize_session=False)
+    db_session.add(Scan(patient_id=scanned, scan_type="xray", date_uploaded=datetime.utcnow()))
+    db_session.add(Scan(patient_id=idle, scan_type="xray", date_uploaded=old.replace(tzinfo=None)))
+    db_session.commit()
+    assert client.post(f"/api/patients/{vitals}/vitals", json={"patient_id": vitals, "heart_rate": 70}).status_code == 200
+    store_image(client, {"id": imaged})
+
+    assert archive_candidates(db_session, limit=10, after_days=365) == [idle]
@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import database
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    replica = database.Replica(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "replicas", [replica])
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([replica]))
+    yield replica
+    replica.engine.dispose()
+
+
+@pytest.fixture
+def routed(replica):
+    app = FastAPI()
+    app.add_middleware(database.ReadYourWritesMiddleware)
+
+    def served_by(db: Session):
+        return "replica" if db.get_bind() is replica.engine else "primary"
+
+    @app.get("/which")
+    def read(db: Session = Depends(database.get_db)):
+        return served_by(db)
+
+    @app.post("/which")
+    def write(db: Session = Depends(database.get_db)):
+        return served_by(db)
+
+    with TestClient(app) as client:
+        yield client
+
+
+def test_reads_go_to_the_replica(routed):
+    assert routed.get("/which").json() == "replica"
+
+
+def test_writes_always_use_the_primary(routed):
+    assert routed.post("/which").json() == "primary"
+    assert routed.post("/which").json() == "primary"
+
+
+def test_reads_after_a_write_stick_to_the_primary(routed, monkeypatch):
+    response = routed.post("/which")
+    assert database.LAST_WRITE_COOKIE in response.cookies
+    assert routed.get("/which").json() == "primary"
+
+    # Once the window has passed the same client is back on the replica
+    monkeypatch.setattr(database.settings, "READ_YOUR_WRITES_SECONDS", 0)
+    assert routed.get("/which").json() == "replica"
+
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_unhealthy(routed, replica, monkeypatch):
+    monkeypatch.setattr(replica, "check", lambda: None)
+    replica.healthy = False
+    assert routed.get("/which").json() == "primary"
+
+    replica.healthy, replica.lag = True, database.settings.REPLICA_MAX_LAG_SECONDS + 1
+    assert routed.get("/which").json() == "primary"
+
+    replica.lag = 0.0
+    assert routed.get("/which").json() == "replica"
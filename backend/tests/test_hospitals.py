@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app import tenancy
+from app.config import settings
+from app.partitioning import PARTITIONED_TABLES, partition_ddl
+
+
+def ids(response):
+    assert response.status_code == 200
+    return [patient["id"] for patient in response.json()]
+
+
+def test_hospital_patients_offset_and_keyset_paging(client, hospital, make_patient):
+    created = [make_patient()["id"] for _ in range(5)]
+    url = f"/api/hospitals/{hospital['id']}/patients"
+    assert ids(client.get(url, params={"limit": 2})) == created[:2]
+    assert ids(client.get(url, params={"skip": 2, "limit": 2})) == created[2:4]
+    assert ids(client.get(url, params={"after_id": created[1], "limit": 2})) == created[2:4]
+    assert ids(client.get(url, params={"after_id": created[-1]})) == []
+
+
+def test_partitioned_tables_keep_generated_ids():
+    statements = partition_ddl(4)
+    for name in PARTITIONED_TABLES:
+        create = next(s for s in statements if s.startswith(f"CREATE TABLE {name} ("))
+        assert "id INTEGER GENERATED BY DEFAULT AS IDENTITY" in create
+        assert "PRIMARY KEY (id, hospital_id)" in create
+        assert create.endswith("PARTITION BY HASH (hospital_id)")
+        assert sum(s.startswith(f"CREATE TABLE {name}_p") for s in statements) == 4
+
+
+def request_for(query: str) -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/", "query_string": query.encode(),
+                    "headers": [], "path_params": {}})
+
+
+def test_import_slots_are_per_known_tenant(monkeypatch):
+    monkeypatch.setattr(settings, "TENANT_QUEUE_TIMEOUT", 0.01)
+    monkeypatch.setattr(tenancy, "_import_slots", tenancy.defaultdict(lambda: asyncio.Semaphore(1)))
+
+    async def scenario():
+        held = tenancy.tenant_import_slot(request_for("hospital_id=7"))
+        await held.__anext__()
+        with pytest.raises(HTTPException) as error:
+            await tenancy.tenant_import_slot(request_for("hospital_id=7")).__anext__()
+        assert error.value.status_code == 429
+        # Callers without a hospital are not queued behind each other
+        for _ in range(3):
+            await tenancy.tenant_import_slot(request_for("")).__anext__()
+        await held.aclose()
+
+    asyncio.run(scenario())
+    assert None not in tenancy._import_slots
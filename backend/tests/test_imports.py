@@ -0,0 +1,68 @@
+import io
+
+import pandas as pd
+import pytest
+
+from app.services.import_service import normalize_rows
+
+
+def sheet(rows):
+    buffer = io.BytesIO()
+    pd.DataFrame(rows).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def run_import(client, hospital, rows, **params):
+    files = {"file": ("patients.xlsx", sheet(rows), "application/octet-stream")}
+    response = client.post("/api/patients/import", params={"hospital_id": hospital["id"], **params}, files=files)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_reimport_is_a_noop_and_keeps_missing_patients(client, hospital):
+    rows = [{"mrn": "A1", "name": "Ann", "age": 40, "gender": "f"},
+            {"mrn": "B2", "name": "Bob", "age": 51, "gender": "m"}]
+    assert run_import(client, hospital, rows)["inserted"] == 2
+    # Same data with age as text, and one patient left off the sheet
+    result = run_import(client, hospital, [{"mrn": "A1", "name": "Ann", "age": "40", "gender": "f"}])
+    assert result == {"inserted": 0, "updated": 0, "removed": 0, "unchanged": 1}
+    assert len(client.get(f"/api/hospitals/{hospital['id']}/patients").json()) == 2
+
+    result = run_import(client, hospital, [{"mrn": "A1", "name": "Ann", "age": "40", "gender": "f"}], remove_missing=True)
+    assert result["removed"] == 1
+
+
+def test_numeric_columns_normalize_before_hashing():
+    rows = normalize_rows(pd.DataFrame({"mrn": ["1", "2", "3"], "age": ["40", 40.0, " 40 "]}), "mrn")
+    assert {row["age"] for row in rows.values()} == {40}
+    with pytest.raises(ValueError, match="Invalid age 'forty' for MRN 1"):
+        normalize_rows(pd.DataFrame({"mrn": ["1"], "age": ["forty"]}), "mrn")
+
+
+def test_failed_import_leaves_archived_patients_archived(client, db_session, hospital, monkeypatch):
+    pytest.importorskip("pyarrow")
+    from app.models.models import ArchivedPatient, Patient
+    from app.services import import_service
+    from app.services.archive_service import archive_batch
+
+    rows = [{"mrn": "A1", "name": "Ann", "age": 40, "gender": "f"}]
+    run_import(client, hospital, rows)
+    patient_id = db_session.query(Patient.id).filter(Patient.mrn == "A1").scalar()
+    archive_batch(db_session, [patient_id])
+
+    def fail(db, changes):
+        raise RuntimeError("counter update failed")
+    with monkeypatch.context() as patched:
+        patched.setattr(import_service, "record_patient_changes", fail)
+        files = {"file": ("patients.xlsx", sheet(rows), "application/octet-stream")}
+        response = client.post("/api/patients/import", params={"hospital_id": hospital["id"]}, files=files)
+        assert response.status_code == 500
+    db_session.expire_all()
+    assert db_session.get(ArchivedPatient, patient_id) is not None
+    assert db_session.query(Patient).filter(Patient.id == patient_id).count() == 0
+
+    # Retried, the restore and the diff commit together
+    assert run_import(client, hospital, rows)["unchanged"] == 1
+    db_session.expire_all()
+    assert db_session.get(ArchivedPatient, patient_id) is None
+    assert client.get(f"/api/hospitals/{hospital['id']}/summary").json()["total_patients"] == 1
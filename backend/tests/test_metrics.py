@@ -0,0 +1,65 @@
+import os
+import re
+
+from app import metrics
+from app.config import settings
+
+
+def count(text, name, **labels):
+    """Sum of the series of `name` carrying all the given labels."""
+    total = 0
+    for body, value in re.findall(rf"^{name}\{{(.*)\}} (\S+)$", text, re.M):
+        series = dict(re.findall(r'(\w+)="([^"]*)"', body))
+        if all(series.get(k) == str(v) for k, v in labels.items()):
+            total += float(value)
+    return total
+
+
+def routes(text):
+    return set(re.findall(r'badal_http_request_duration_seconds_count\{[^}]*route="([^"]*)"', text))
+
+
+def test_routes_are_labelled_with_full_templates(client, hospital, make_patient):
+    patient = make_patient()
+    client.get(f"/api/patients/{patient['id']}")
+    client.get("/api/patients/999999")
+    client.get(f"/api/hospitals/{hospital['id']}/summary")
+    client.get("/no/such/path/123")
+    text = client.get("/metrics").text
+
+    seen = routes(text)
+    assert {"/api/hospitals/", "/api/patients/", "/api/patients/{patient_id}",
+            "/api/hospitals/{hospital_id}/summary", "unmatched"} <= seen
+    # Ids never become label values
+    assert not any(re.search(r"/\d+", route) for route in seen)
+    assert count(text, "badal_http_request_duration_seconds_count", pid=os.getpid(), method="GET",
+                 route="/api/patients/{patient_id}", status="404") >= 1
+
+
+def test_query_count_is_recorded_per_request(client, hospital):
+    def queries():
+        text = client.get("/metrics").text
+        labels = {"method": "GET", "route": "/api/hospitals/{hospital_id}/summary"}
+        return (count(text, "badal_http_request_db_queries_count", **labels),
+                count(text, "badal_http_request_db_queries_sum", **labels))
+
+    before_n, before_sum = queries()
+    client.get(f"/api/hospitals/{hospital['id']}/summary")
+    after_n, after_sum = queries()
+    assert after_n == before_n + 1
+    assert after_sum - before_sum >= 2  # hospital lookup plus the summary row
+
+
+def test_scrape_includes_other_workers(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_DIR", str(tmp_path))
+    other = metrics.Histogram(metrics.LATENCY_BUCKETS)
+    other.observe(("GET", "/api/patients/", "200"), 0.02)
+    (tmp_path / "worker-1.json").write_text(
+        '{"badal_http_request_duration_seconds": %s}' % str(other.snapshot()).replace("'", '"')
+    )
+    text = client.get("/metrics").text
+    assert count(text, "badal_http_request_duration_seconds_count", pid=1, route="/api/patients/") == 1
+    metrics.flush_worker_metrics()
+    assert (tmp_path / f"worker-{os.getpid()}.json").exists()
+    metrics.remove_worker_metrics(1)
+    assert 'pid="1"' not in client.get("/metrics").text
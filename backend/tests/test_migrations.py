@@ -0,0 +1,73 @@
+import argparse
+
+from sqlalchemy import Column, MetaData, Table, inspect, insert, text
+
+import manage
+from app.database import SessionLocal, engine
+from app.models.models import GeneticData, Scan, VitalSigns
+from app.services.genetic_service import backfill_risk_columns
+
+
+def create_without(model, *dropped):
+    """Recreate `model`'s table as it was before `dropped` columns were added to the model."""
+    model.__table__.drop(engine)
+    legacy = Table(model.__tablename__, MetaData(), *(
+        Column(column.name, column.type, primary_key=column.primary_key)
+        for column in model.__table__.columns if column.name not in dropped
+    ))
+    legacy.create(engine)
+    return legacy
+
+
+def test_tenant_backfill_adds_missing_columns(client, hospital, make_patient):
+    patient = make_patient()
+    for model in (Scan, VitalSigns):
+        legacy = create_without(model, "hospital_id")
+        with engine.begin() as conn:
+            conn.execute(insert(legacy).values(id=1, patient_id=patient["id"]))
+
+    manage.backfill_tenant_keys(argparse.Namespace())
+
+    inspector = inspect(engine)
+    with engine.connect() as conn:
+        for model in (Scan, VitalSigns):
+            assert "hospital_id" in {c["name"] for c in inspector.get_columns(model.__tablename__)}
+            assert {i.name for i in model.__table__.indexes} <= {
+                i["name"] for i in inspector.get_indexes(model.__tablename__)
+            }
+            owner = conn.execute(text(f"SELECT hospital_id FROM {model.__tablename__}")).scalar()
+            assert owner == hospital["id"]
+
+    # A second run finds nothing left to add
+    manage.backfill_tenant_keys(argparse.Namespace())
+
+
+def test_genetic_risk_backfill_adds_missing_columns(client, make_patient):
+    patient = make_patient()
+    legacy = create_without(GeneticData, "risk_level", "risk_score", "matched_markers")
+    analyses = [
+        {"risk_level": "High", "risk_score": 75.0, "matched_markers": ["BRCA1", "TP53"]},
+        None,
+        {"risk_level": "Low", "risk_score": 5.0, "matched_markers": []},
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(legacy), [
+            {"id": i, "patient_id": patient["id"], "analysis_result": analysis}
+            for i, analysis in enumerate(analyses, start=1)
+        ])
+
+    manage.backfill_genetic_risk(argparse.Namespace(batch_size=1))
+
+    assert {i.name for i in GeneticData.__table__.indexes} <= {
+        i["name"] for i in inspect(engine).get_indexes("genetic_data")
+    }
+    db = SessionLocal()
+    try:
+        rows = db.query(GeneticData).order_by(GeneticData.id).all()
+        assert [(r.risk_level, r.risk_score, r.matched_markers) for r in rows] == [
+            ("High", 75.0, "BRCA1,TP53"), (None, None, None), ("Low", 5.0, "")
+        ]
+        # Rows already carrying risk columns are left alone
+        assert backfill_risk_columns(db) == 0
+    finally:
+        db.close()
@@ -0,0 +1,103 @@
+import io
+import json
+import zipfile
+
+import numpy as np
+from PIL import Image
+
+from app.config import settings
+from app.routes.ml import analyze_skin_cancer_prediction
+
+
+def png(seed: int = 0, size: int = 32) -> bytes:
+    pixels = (np.random.default_rng(seed).random((size, size, 3)) * 255).astype("uint8")
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_unknown_model_class_is_reported_by_code():
+    result = analyze_skin_cancer_prediction({"scc": 0.9, "nv": 0.1})
+    assert result["class_code"] == "scc"
+    assert result["type"] == "scc"
+
+
+def test_predict_skin_reports_model_version(client):
+    response = client.post("/api/ml/predict/skin", files={"file": ("lesion.png", png(), "image/png")})
+    assert response.status_code == 200, response.text
+    assert response.json()["model_version"] == "mock"
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_batch_scores_images_and_zip_members(client):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a.png", png(1))
+        zf.writestr("notes.txt", "skipped")
+        zf.writestr("b.png", b"not an image")
+    files = [("files", ("one.png", png(0), "image/png")), ("files", ("set.zip", archive.getvalue(), "application/zip"))]
+    results = ndjson(client.post("/api/ml/predict/skin/batch", files=files))
+    assert [r["filename"] for r in results] == ["one.png", "a.png", "b.png"]
+    assert "prediction" in results[0] and "prediction" in results[1]
+    assert "error" in results[2]
+
+
+def test_batch_rejects_oversized_zip_members(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_BATCH_IMAGE_BYTES", 1024)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("bomb.png", b"\0" * 1024 * 1024)  # compresses to about 1 KB
+        zf.writestr("small.png", png(2, size=8))
+    results = ndjson(client.post("/api/ml/predict/skin/batch",
+                                 files=[("files", ("set.zip", archive.getvalue(), "application/zip"))]))
+    assert results[0]["filename"] == "bomb.png"
+    assert "exceeds 1024 bytes" in results[0]["error"]
+    assert "prediction" in results[1]
+
+
+def test_batch_enforces_total_budget(client, monkeypatch):
+    image = png(3, size=8)
+    monkeypatch.setattr(settings, "MAX_BATCH_TOTAL_BYTES", len(image) + 10)
+    files = [("files", (f"{i}.png", image, "image/png")) for i in range(2)]
+    results = ndjson(client.post("/api/ml/predict/skin/batch", files=files))
+    assert "prediction" in results[0]
+    assert "Batch exceeds" in results[1]["error"]
+
+
+def test_single_and_batch_share_preprocessing():
+    from app.routes.ml import decode_image, preprocess_image
+
+    contents = png(4)
+    np.testing.assert_array_equal(preprocess_image(contents, 16)[0], decode_image(contents, 16) / np.float32(255.0))
+
+
+def test_batch_reports_images_past_the_cap(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_BATCH_IMAGES", 2)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"{i}.png", png(10 + i, size=8))
+    files = [("files", ("set.zip", archive.getvalue(), "application/zip")),
+             ("files", ("extra.png", png(20, size=8), "image/png"))]
+    results = ndjson(client.post("/api/ml/predict/skin/batch", files=files))
+    assert [r["filename"] for r in results] == ["0.png", "1.png", "2.png", "extra.png"]
+    assert all("prediction" in r for r in results[:2])
+    assert [r["skipped"] for r in results[2:]] == ["Batch limit of 2 images reached"] * 2
+
+
+def test_embedding_dim_must_fit_an_rgb_thumbnail():
+    import os
+    import subprocess
+    import sys
+
+    from app.routes.ml import compute_embedding
+
+    assert compute_embedding(Image.open(io.BytesIO(png()))).shape == (settings.EMBEDDING_DIM,)
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", "import app.routes.ml"], cwd=backend, capture_output=True,
+                            text=True, env={**os.environ, "EMBEDDING_DIM": "200"})
+    assert result.returncode != 0
+    assert "EMBEDDING_DIM must be 3 * k * k" in result.stderr
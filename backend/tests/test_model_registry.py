@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from app import model_store
+from app.model_registry import ModelRegistry
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+SIZE = 8
+CLASSES = ["a", "b", "c"]
+
+
+def write_model(model_dir, version, weights):
+    """Linear classifier over a SIZE x SIZE x 3 image with W kept as an external .npy initializer."""
+    from onnx import TensorProto, helper, numpy_helper
+
+    directory = model_dir / "skin" / version
+    (directory / "weights").mkdir(parents=True)
+    np.save(directory / "weights" / "W.npy", weights)
+    w = TensorProto(name="W", data_type=TensorProto.FLOAT, dims=weights.shape, data_location=TensorProto.EXTERNAL)
+    w.external_data.add(key="location", value="weights/W.bin")
+    graph = helper.make_graph(
+        [helper.make_node("Reshape", ["x", "shape"], ["flat"]), helper.make_node("MatMul", ["flat", "W"], ["y"])],
+        "skin",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [None, SIZE, SIZE, 3])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [None, len(CLASSES)])],
+        [numpy_helper.from_array(np.array([-1, SIZE * SIZE * 3], dtype=np.int64), "shape"), w],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, directory / "model.onnx")
+    (directory / "metadata.json").write_text(f'{{"classes": {CLASSES!r}, "input_size": {SIZE}}}'.replace("'", '"'))
+
+
+def test_onnx_initializers_come_from_shared_maps(tmp_path):
+    weights = np.random.default_rng(0).random((SIZE * SIZE * 3, len(CLASSES)), dtype=np.float32)
+    write_model(tmp_path, "v1", weights)
+    model_store.preload(str(tmp_path))
+
+    model = ModelRegistry(str(tmp_path), threads=1).load("skin", "v1")
+    batch = np.random.default_rng(1).random((2, SIZE, SIZE, 3), dtype=np.float32)
+    np.testing.assert_allclose(model.predict(batch), batch.reshape(2, -1) @ weights, rtol=1e-4)
+
+    # The session runs directly on the preloaded memory map
+    mapped = model_store.weights_for(str(tmp_path / "skin" / "v1"))["W"]
+    assert isinstance(mapped, np.memmap)
+    assert model.backend._initializers[0].data_ptr() == mapped.ctypes.data
+
+
+def test_activation_propagates_to_other_workers(tmp_path):
+    rng = np.random.default_rng(2)
+    for version in ("v1", "v2"):
+        write_model(tmp_path, version, rng.random((SIZE * SIZE * 3, len(CLASSES)), dtype=np.float32))
+    # Two registries stand in for two worker processes sharing MODEL_DIR
+    worker_a = ModelRegistry(str(tmp_path), threads=1, sync_interval=0)
+    worker_b = ModelRegistry(str(tmp_path), threads=1, sync_interval=0)
+    worker_a.load_latest("skin")
+    worker_b.load_latest("skin")
+    assert worker_b.active("skin").version == "v2"
+
+    worker_a.activate("skin", "v1")
+    assert worker_a.active("skin").version == "v1"
+    # worker_b keeps serving v2 until its background reload swaps v1 in
+    worker_b.active("skin")
+    worker_b._reloading["skin"].join(timeout=10)
+    assert worker_b.active("skin").version == "v1"
+
+    # A restarted worker starts on the activated version, not the newest
+    assert ModelRegistry(str(tmp_path), threads=1).load_latest("skin").version == "v1"
+
+
+@pytest.mark.parametrize("name, version, error", [
+    ("skin", "v9", LookupError),
+    ("skin", "../skin/v1", ValueError),
+    ("skin", "..", ValueError),
+    ("../skin", "v1", ValueError),
+])
+def test_activate_rejects_unknown_versions_before_writing(tmp_path, name, version, error):
+    write_model(tmp_path, "v1", np.zeros((SIZE * SIZE * 3, len(CLASSES)), dtype=np.float32))
+    registry = ModelRegistry(str(tmp_path), threads=1)
+    with pytest.raises(error):
+        registry.activate(name, version)
+    assert registry.pinned_version("skin") is None
+
+
+def test_activate_endpoint_maps_errors(client):
+    assert client.post("/api/ml/models/skin/activate", params={"version": "missing"}).status_code == 404
+    assert client.post("/api/ml/models/skin/activate", params={"version": "..\\x"}).status_code == 400
@@ -0,0 +1,57 @@
+def test_bulk_update_groups_and_coerces(client, make_patient):
+    first, second, third = make_patient(), make_patient(), make_patient()
+    response = client.patch("/api/patients/bulk", json={"updates": [
+        {"id": first["id"], "changes": {"condition": "stable"}},
+        {"id": second["id"], "changes": {"condition": "stable"}},
+        {"id": third["id"], "changes": {"age": "52"}},
+    ]})
+    assert response.status_code == 200
+    assert response.json()["updated"] == 3
+    assert client.get(f"/api/patients/{second['id']}").json()["condition"] == "stable"
+    assert client.get(f"/api/patients/{third['id']}").json()["age"] == 52
+
+
+def test_bulk_update_rejects_invalid_rows(client, make_patient):
+    patients = [make_patient() for _ in range(5)]
+    bad = [{"age": "abc"}, {"hospital_id": None}, {"name": ["a", "b"]}, {"condition": {"nested": 1}}, {"mrn": "x"}]
+    response = client.patch("/api/patients/bulk", json={"updates": [
+        {"id": patient["id"], "changes": changes} for patient, changes in zip(patients, bad)
+    ] + [{"id": 999999, "changes": {"condition": "stable"}}]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["rejected"] * 5 + ["not_found"]
+    assert results[0]["detail"].startswith("age:")
+    assert results[1]["detail"] == "Fields cannot be null: hospital_id"
+    assert results[4]["detail"] == "Fields not allowed: mrn"
+    assert client.get(f"/api/patients/{patients[0]['id']}").json()["age"] == 40
+
+
+def test_patient_listing_pages_are_stable(client, make_patient):
+    created = [make_patient()["id"] for _ in range(4)]
+    client.put(f"/api/patients/{created[0]}", json={"condition": "stable"})  # moves the row on some engines
+    first = client.get("/api/patients/", params={"limit": 2}).json()
+    second = client.get("/api/patients/", params={"skip": 2, "limit": 2}).json()
+    assert [p["id"] for p in first + second] == created
+    rows = client.get("/api/patients/", params={"fields": "id,name", "skip": 1, "limit": 2}).json()
+    assert [p["id"] for p in rows] == created[1:3]
+
+
+def test_patient_listing_filters_on_genetic_risk(client, db_session, make_patient):
+    from app.models.models import GeneticData
+    from app.services.genetic_service import apply_analysis
+
+    high, medium, low, untested = (make_patient()["id"] for _ in range(4))
+    for patient_id, level, score in ((high, "High", 82.5), (medium, "Medium", 55.0), (low, "Low", 10.0)):
+        genetic_data = GeneticData(patient_id=patient_id)
+        apply_analysis(genetic_data, {"risk_level": level, "risk_score": score, "matched_markers": ["BRCA1"]})
+        db_session.add(genetic_data)
+    db_session.commit()
+
+    def listed(**params):
+        return [p["id"] for p in client.get("/api/patients/", params=params).json()]
+
+    assert listed(genetic_risk="High") == [high]
+    assert listed(min_score=50) == [high, medium]
+    assert listed(genetic_risk="Medium", min_score=60) == []
+    assert listed(genetic_risk="Low", fields="name") == [low]
+    assert listed() == [high, medium, low, untested]
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.similarity import SimilarityIndex
+
+DIM = 8
+
+
+def vectors(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+
+
+def test_append_during_rebuild_is_kept(tmp_path):
+    rebuilding, other_worker = SimilarityIndex(str(tmp_path), DIM), SimilarityIndex(str(tmp_path), DIM)
+    data = vectors(4)
+    appended = threading.Event()
+
+    def rows():
+        for i in range(3):
+            yield i + 1, data[i]
+            if i == 0:
+                threading.Thread(target=lambda: (other_worker.add(99, data[3]), appended.set())).start()
+                time.sleep(0.1)
+                assert not appended.is_set()  # held off until the new files are in place
+
+    assert rebuilding.rebuild(rows()) == 3
+    assert appended.wait(5)
+    assert rebuilding.search(data[3], 1)[0][0] == 99
+    assert len(rebuilding) == 4
+
+
+def test_ivf_files_are_replaced_atomically_and_picked_up(tmp_path):
+    writer, reader = SimilarityIndex(str(tmp_path), DIM), SimilarityIndex(str(tmp_path), DIM)
+    data = vectors(64, seed=1)
+    writer.rebuild(enumerate(data))
+    assert reader.search(data[5], 1)[0][0] == 5
+    assert writer.train_ivf(nlist=4) == 4
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    assert reader.search(data[5], 1)[0][0] == 5
+    assert reader._centroids is not None
+
+    # Same row count, different contents: the reader must notice the swap
+    writer.rebuild(enumerate(data[::-1]))
+    assert reader.search(data[5], 1)[0][0] == 63 - 5
+    assert reader._centroids is None
+
+
+def test_remove_keeps_ivf_lists_consistent(tmp_path):
+    writer, reader = SimilarityIndex(str(tmp_path), DIM), SimilarityIndex(str(tmp_path), DIM)
+    data = vectors(64, seed=2)
+    writer.rebuild(enumerate(data))
+    writer.train_ivf(nlist=4)
+    writer.add(100, data[7])
+    assert reader.search(data[7], 2)[0][0] in (7, 100)
+
+    assert writer.remove([7, 100, 12345]) == 2
+    assert reader.vector(7) is None and reader.vector(100) is None
+    assert len(reader) == 63
+    assert all(image_id not in (7, 100) for image_id, _ in reader.search(data[7], 10))
+    assert sum(len(positions) for positions in reader._lists) == 63
@@ -0,0 +1,71 @@
+from app.models.models import HospitalSummary
+from app.services.summary_service import _ensure_summary, _insert_missing, rebuild_hospital_summaries
+
+
+def test_counters_follow_patient_writes(client, hospital, make_patient):
+    first = make_patient(condition="critical")
+    make_patient(condition="stable")
+    client.put(f"/api/patients/{first['id']}", json={"condition": "recovered"})
+
+    summary = client.get(f"/api/hospitals/{hospital['id']}/summary").json()
+    assert summary["total_patients"] == 2
+    assert summary["critical_patients"] == 0
+    assert summary["recovered_patients"] == 1
+    assert summary["recent_admissions"] == 2
+
+    client.delete(f"/api/patients/{first['id']}")
+    summary = client.get(f"/api/hospitals/{hospital['id']}/summary").json()
+    assert summary["total_patients"] == 1
+    assert summary["recovered_patients"] == 0
+
+
+def test_rebuild_matches_incremental_counters(client, db_session, hospital, make_patient):
+    make_patient(condition="critical")
+    make_patient(status="discharged")
+    before = client.get(f"/api/hospitals/{hospital['id']}/summary").json()
+    rebuild_hospital_summaries(db_session)
+    after = client.get(f"/api/hospitals/{hospital['id']}/summary").json()
+    for field in ("total_patients", "active_patients", "critical_patients", "recent_admissions"):
+        assert after[field] == before[field]
+
+
+def test_ensure_summary_tolerates_existing_row(db_session, hospital):
+    # A concurrent first write may have created the row between our check and insert
+    db_session.add(HospitalSummary(hospital_id=hospital["id"], total_patients=3, active_patients=0,
+                                   critical_patients=0, recovered_patients=0))
+    db_session.commit()
+    db_session.expunge_all()
+    _insert_missing(db_session, HospitalSummary, {
+        "hospital_id": hospital["id"], "total_patients": 0, "active_patients": 0,
+        "critical_patients": 0, "recovered_patients": 0,
+    })
+    _ensure_summary(db_session, hospital["id"])
+    db_session.commit()
+    assert db_session.get(HospitalSummary, hospital["id"]).total_patients == 3
+
+
+def test_null_is_active_is_not_live_anywhere(client, db_session, hospital, make_patient):
+    from app.models.models import Patient
+    from app.services.summary_service import snapshot_patient
+
+    patient = make_patient()
+    db_session.query(Patient).filter(Patient.id == patient["id"]).update({Patient.is_active: None})
+    db_session.commit()
+    assert snapshot_patient(db_session.get(Patient, patient["id"]))["is_active"] is False
+    rebuild_hospital_summaries(db_session)
+    assert client.get(f"/api/hospitals/{hospital['id']}/summary").json()["total_patients"] == 0
+    assert all(p["id"] != patient["id"] for p in client.get("/api/patients/").json())
+
+
+def test_admission_days_use_utc():
+    from datetime import date, datetime, timedelta, timezone
+
+    from app.models.models import Patient
+    from app.services.summary_service import snapshot_patient, utc_day
+
+    # 00:30 in UTC+5 is still the previous day in UTC, where created_at is written
+    local = datetime(2024, 3, 2, 0, 30, tzinfo=timezone(timedelta(hours=5)))
+    assert utc_day(local) == date(2024, 3, 1)
+    assert utc_day(datetime(2024, 3, 1, 23, 59)) == date(2024, 3, 1)
+    patient = Patient(hospital_id=1, status="active", is_active=True, created_at=local)
+    assert snapshot_patient(patient)["admitted_on"] == date(2024, 3, 1)
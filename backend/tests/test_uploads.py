@@ -0,0 +1,64 @@
+import hashlib
+import os
+
+from app.models.models import Scan
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def start_upload(client, patient, data, filename="scan.dcm", chunk_size=4):
+    response = client.post("/api/uploads/", json={
+        "patient_id": patient["id"], "kind": "scan", "filename": filename, "total_size": len(data),
+        "chunk_size": chunk_size, "sha256": sha256(data), "scan_type": "MRI",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def put_chunk(client, upload, index, body):
+    return client.put(f"/api/uploads/{upload['id']}/chunks/{index}", content=body,
+                      headers={"X-Chunk-SHA256": sha256(body)})
+
+
+def send_all(client, upload, data):
+    for index in range(upload["total_chunks"]):
+        assert put_chunk(client, upload, index, data[index * 4:(index + 1) * 4]).status_code == 200
+
+
+def test_resume_after_missing_and_corrupt_chunks(client, make_patient):
+    data = b"0123456789"
+    upload = start_upload(client, make_patient(), data)
+    assert upload["total_chunks"] == 3
+
+    assert put_chunk(client, upload, 2, data[8:]).status_code == 200
+    corrupt = client.put(f"/api/uploads/{upload['id']}/chunks/0", content=data[:4],
+                         headers={"X-Chunk-SHA256": sha256(b"nope")})
+    assert corrupt.status_code == 400
+    assert put_chunk(client, upload, 0, data[:5]).status_code == 400  # longer than the slot
+
+    status = client.get(f"/api/uploads/{upload['id']}").json()
+    assert status["missing_chunks"] == [0, 1]
+    assert client.post(f"/api/uploads/{upload['id']}/complete").status_code == 409
+
+    send_all(client, upload, data)  # re-sending chunk 2 is harmless
+    done = client.post(f"/api/uploads/{upload['id']}/complete")
+    assert done.status_code == 200
+    assert done.json()["status"] == "complete"
+
+
+def test_same_filename_does_not_overwrite_earlier_scan(client, db_session, make_patient):
+    patient = make_patient()
+    contents = [b"first scan", b"second scan"]
+    for data in contents:
+        upload = start_upload(client, patient, data)
+        send_all(client, upload, data)
+        assert client.post(f"/api/uploads/{upload['id']}/complete").status_code == 200
+
+    scans = db_session.query(Scan).filter(Scan.patient_id == patient["id"]).order_by(Scan.id).all()
+    assert len({scan.file_path for scan in scans}) == 2
+    for scan, data in zip(scans, contents):
+        with open(scan.file_path, "rb") as f:
+            assert f.read() == data
+        assert os.path.basename(scan.file_path).endswith("_scan.dcm")
@@ -9,6 +9,7 @@ const Header = () => {
   const handleLogout = () => {
     localStorage.removeItem('isAuthenticated');
     localStorage.removeItem('userRole');
+    localStorage.removeItem('hospitalId');
     navigate('/');
   };
 
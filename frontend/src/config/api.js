@@ -7,6 +7,9 @@ export const ENDPOINTS = {
   LOGIN: '/auth/login',
   REGISTER: '/auth/register',
   
+  // Hospital endpoints
+  HOSPITAL_SUMMARY: (id) => `/hospitals/${id}/summary`,
+  
   // Patient endpoints
   PATIENTS: '/patients',
   PATIENT_DETAIL: (id) => `/patients/${id}`,
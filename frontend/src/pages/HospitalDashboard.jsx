@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
-import { Link } from 'react-router-dom';
+import { Link, useNavigate } from 'react-router-dom';
 import LoadingSpinner from '../components/LoadingSpinner';
+import { getHospitalSummary } from '../services/api';
 
 const HospitalDashboard = () => {
   const [stats, setStats] = useState({
@@ -8,20 +9,27 @@ const HospitalDashboard = () => {
     activePatients: 0,
     criticalCases: 0,
     recoveredPatients: 0,
+    recentAdmissions: 0,
   });
   const [loading, setLoading] = useState(true);
+  const navigate = useNavigate();
 
   useEffect(() => {
-    // Simulate fetching dashboard data
     const fetchDashboardData = async () => {
       try {
-        // Replace with actual API call
-        await new Promise(resolve => setTimeout(resolve, 1000));
+        // Counters are maintained on write, so this is a single-row lookup
+        const hospitalId = localStorage.getItem('hospitalId');
+        if (!hospitalId) {
+          navigate('/');
+          return;
+        }
+        const summary = await getHospitalSummary(hospitalId);
         setStats({
-          totalPatients: 150,
-          activePatients: 45,
-          criticalCases: 8,
-          recoveredPatients: 97,
+          totalPatients: summary.total_patients,
+          activePatients: summary.active_patients,
+          criticalCases: summary.critical_patients,
+          recoveredPatients: summary.recovered_patients,
+          recentAdmissions: summary.recent_admissions,
         });
       } catch (error) {
         console.error('Error fetching dashboard data:', error);
@@ -31,7 +39,7 @@ const HospitalDashboard = () => {
     };
 
     fetchDashboardData();
-  }, []);
+  }, [navigate]);
 
   if (loading) return <LoadingSpinner />;
 
@@ -56,6 +64,10 @@ const HospitalDashboard = () => {
           <h3>Recovered</h3>
           <p className="stat-number">{stats.recoveredPatients}</p>
         </div>
+        <div className="stat-card">
+          <h3>Admissions (7 days)</h3>
+          <p className="stat-number">{stats.recentAdmissions}</p>
+        </div>
       </div>
       <div className="quick-actions">
         <h2>Quick Actions</h2>
@@ -38,7 +38,8 @@ const Login = () => {
       const validCredentials = {
         hospital: {
           email: 'hospital@demo.com',
-          password: 'password'
+          password: 'password',
+          hospitalId: 1
         },
         researcher: {
           email: 'researcher@demo.com',
@@ -53,6 +54,12 @@ const Login = () => {
       ) {
         localStorage.setItem('userRole', formData.role);
         localStorage.setItem('isAuthenticated', 'true');
+        if (roleCredentials.hospitalId) {
+          // Hospital-scoped pages (dashboard summary) read the signed-in hospital from here
+          localStorage.setItem('hospitalId', String(roleCredentials.hospitalId));
+        } else {
+          localStorage.removeItem('hospitalId');
+        }
         
         // Navigate to the appropriate page
         navigate(formData.role === 'hospital' ? '/patients' : '/research');
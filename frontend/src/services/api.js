@@ -1,8 +1,11 @@
 import axios from 'axios';
 import { API_BASE_URL, ENDPOINTS, getFileHeaders, getHeaders } from '../config/api';
 
+// Credentials are sent on every call so the API's read-your-writes cookie
+// (badal_last_write) keeps reads after a write on the primary database.
 const api = axios.create({
   baseURL: API_BASE_URL,
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -26,6 +29,7 @@ api.interceptors.response.use(
 // Auth API calls
 export const loginUser = async (credentials) => {
   const response = await fetch(`${API_BASE_URL}${ENDPOINTS.LOGIN}`, {
+    credentials: 'include',
     method: 'POST',
     headers: getHeaders(),
     body: JSON.stringify(credentials)
@@ -42,6 +46,7 @@ export const loginUser = async (credentials) => {
 
 export const register = async (userData) => {
   const response = await fetch(`${API_BASE_URL}${ENDPOINTS.REGISTER}`, {
+    credentials: 'include',
     method: 'POST',
     headers: getHeaders(),
     body: JSON.stringify(userData),
@@ -54,6 +59,17 @@ export const register = async (userData) => {
   return response.json();
 };
 
+// Hospital API calls
+export const getHospitalSummary = async (hospitalId) => {
+  try {
+    const response = await api.get(ENDPOINTS.HOSPITAL_SUMMARY(hospitalId));
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching hospital summary:', error);
+    throw error;
+  }
+};
+
 // Patients API calls
 export const getPatients = async () => {
   try {
@@ -78,6 +94,7 @@ export const getPatientDetail = async (id) => {
 export const addPatient = async (patientData) => {
   try {
     const response = await fetch(`${API_BASE_URL}/patients`, {
+      credentials: 'include',
       method: 'POST',
       headers: getHeaders(),
       body: JSON.stringify(patientData)
@@ -124,6 +141,7 @@ export const uploadPatientScan = async (id, scanData) => {
   formData.append('scan_file', scanData.file);
   
   const response = await fetch(`${API_BASE_URL}${ENDPOINTS.PATIENT_SCANS(id)}`, {
+    credentials: 'include',
     method: 'POST',
     headers: getFileHeaders(),
     body: formData
@@ -156,6 +174,7 @@ export const predictSkinCancer = async (imageFile) => {  // Changed parameter na
   
   try {
     const response = await fetch(`${API_BASE_URL}/ml/predict/skin`, {
+      credentials: 'include',
       method: 'POST',
       body: imageFile,
       headers: {
@@ -179,6 +198,7 @@ export const predictSkinCancer = async (imageFile) => {  // Changed parameter na
 
 export const predictGeneticCancer = async (formData) => {
   const response = await fetch(`${API_BASE_URL}${ENDPOINTS.GENETIC_CANCER_PREDICT}`, {
+    credentials: 'include',
     method: 'POST',
     headers: getFileHeaders(),
     body: formData
@@ -197,6 +217,7 @@ export const getResearchData = async (filters = {}) => {
   const response = await fetch(
     `${API_BASE_URL}${ENDPOINTS.RESEARCH_DATA}?${queryString}`,
     {
+      credentials: 'include',
       headers: getHeaders()
     }
   );
@@ -213,6 +234,7 @@ export const downloadResearchData = async (format, filters = {}) => {
   const response = await fetch(
     `${API_BASE_URL}${ENDPOINTS.RESEARCH_DOWNLOAD}?${queryString}`,
     {
+      credentials: 'include',
       headers: getHeaders()
     }
   );
@@ -226,6 +248,7 @@ export const downloadResearchData = async (format, filters = {}) => {
 
 export const generateReport = async (filters) => {
   const response = await fetch(`${API_BASE_URL}/api/research/report`, {
+    credentials: 'include',
     method: 'POST',
     headers: getHeaders(),
     body: JSON.stringify(filters),